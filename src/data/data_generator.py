@@ -1 +1,516 @@
+"""
+Synthetic market data generation.
 
+Price paths are produced chunk by chunk, each chunk being a handful of batched
+NumPy operations, so generation time grows linearly with the number of points
+and never involves a Python-level loop per tick.
+"""
+import os
+import threading
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+import polars as pl
+from scipy.signal import lfilter
+
+from utils.process_pool import process_pool
+from utils.shared_arrays import SharedArray
+from .distributions import make_innovations
+from .presets import PRICE_PRESETS
+from .regimes import RegimeSwitching, regime_parameters
+from .volume import VolumeModel
+
+SECONDS_PER_DAY = 86400.0
+SECONDS_PER_YEAR = 365.0 * SECONDS_PER_DAY  # Crypto markets trade around the clock
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Ticks simulated per block. The path is always simulated in blocks of this
+# size, whatever the caller asks for, so it must never depend on chunk sizes.
+_BLOCK_SIZE = 1 << 16
+DEFAULT_STREAM_CHUNK_SIZE = 1 << 14
+DEFAULT_START_TIME = np.datetime64("2024-01-01T00:00:00", "ms")
+
+# Mirrors the defaults of the Price Settings group in Ui_MainWindow
+DEFAULT_PRICE_SETTINGS = {
+    "initial_price": 100.0,
+    "volatility": 15.0,        # Annualised volatility (%)
+    "drift": 0.0,              # Annualised drift (%)
+    "mean_reversion": 0.15,    # Reversion speed towards the drift trend (per day)
+    "market_regime": "Normal",
+    "regime_switching": False, # Markov switching between market regimes
+    "regime_transitions": None,# Daily transition matrix, REGIME_TRANSITIONS by default
+    "distribution": "Normal",
+    "distribution_params": {}, # Overrides for the distribution's own parameters
+    "gap_probability": 0.02,   # Chance of a gap per day
+    "gap_size": 2.0            # Mean absolute gap size (%)
+}
+
+PRICE_COLUMNS = ("timestamp", "open", "high", "low", "close")
+OHLCV_COLUMNS = PRICE_COLUMNS + ("volume",)
+
+# Spawn key suffix of the volume RNG stream, kept apart from the price stream
+_VOLUME_STREAM = 0x766F6C
+
+
+class DataGenerator:
+    """
+    Generates OHLCV bars, one per tick interval, from Price and Volume Settings.
+
+    The log price is a drift trend plus an Ornstein-Uhlenbeck deviation that
+    absorbs both the shocks of the selected innovation distribution and the
+    opening gaps. With regime switching enabled, drift and volatility are
+    looked up per tick from a sampled regime path. The deviation is solved
+    for a whole block at once as a first-order IIR filter, and intra-bar
+    highs and lows are sampled exactly from the Brownian bridge between the
+    open and the close. Volumes come from a separate RNG stream, so volume
+    settings never change the price path. The generator keeps its RNG and
+    process state between calls, so consecutive calls continue the same path.
+
+    The process is always simulated in blocks of ``_BLOCK_SIZE`` ticks, and
+    chunks are cut from those blocks, so a seed gives the same ticks however
+    they are requested: ``chunk_size``, ``next_chunk`` sizes and pauses of
+    an infinite run only change where the path is cut.
+    """
+
+    def __init__(self, price_settings=None, seed=None, tick_interval=1.0,
+                 start_time=DEFAULT_START_TIME, chunk_size=DEFAULT_CHUNK_SIZE,
+                 volume_settings=None):
+        self.price_settings = {**DEFAULT_PRICE_SETTINGS, **(price_settings or {})}
+        self.volume = VolumeModel(volume_settings, tick_interval)
+        # Resolve a missing seed up front so that reset() reproduces the same path
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.tick_interval = float(tick_interval)
+        self.start_time = np.datetime64(start_time, "ms")
+        self.chunk_size = int(chunk_size)
+        self._configure()
+        self.reset()
+
+    @property
+    def seed(self):
+        return self.seed_sequence.entropy
+
+    def _configure(self):
+        """Convert the user-facing settings into per-tick model constants."""
+        settings = self.price_settings
+        dt = self.tick_interval / SECONDS_PER_YEAR
+        sigma = settings["volatility"] / 100.0
+        mu = settings["drift"] / 100.0
+
+        self._step_vol = sigma * np.sqrt(dt)
+        self._step_drift = (mu - 0.5 * sigma ** 2) * dt
+        self._decay = np.exp(-settings["mean_reversion"] * self.tick_interval / SECONDS_PER_DAY)
+        self._gap_rate = min(settings["gap_probability"] * self.tick_interval / SECONDS_PER_DAY, 1.0)
+        self._gap_scale = settings["gap_size"] / 100.0
+        self._log_initial = np.log(settings["initial_price"])
+        self._interval_ms = int(round(self.tick_interval * 1000))
+        self.innovations = make_innovations(settings["distribution"], self.tick_interval,
+                                            **settings["distribution_params"])
+
+        self.regimes = None
+        if settings["regime_switching"]:
+            self.regimes = RegimeSwitching(settings["market_regime"], self.tick_interval,
+                                           settings["regime_transitions"])
+            drifts, volatilities = regime_parameters(settings["market_regime"],
+                                                     settings["drift"], settings["volatility"])
+            self._regime_vol = volatilities / 100.0 * np.sqrt(dt)
+            self._regime_drift = (drifts / 100.0 - 0.5 * (volatilities / 100.0) ** 2) * dt
+
+    def reset(self):
+        """Restore the RNG and process state to the start of the path."""
+        self.rng = np.random.default_rng(self.seed_sequence)
+        self.volume_rng = np.random.default_rng(np.random.SeedSequence(
+            self.seed_sequence.entropy,
+            spawn_key=self.seed_sequence.spawn_key + (_VOLUME_STREAM,)
+        ))
+        self.tick = 0
+        # Ticks of the last simulated block not handed out yet, from _offset on
+        self._simulated = 0
+        self._block = None
+        self._offset = 0
+        self._trend = 0.0
+        self._deviation = 0.0
+        self._log_close = self._log_initial
+        self.innovations.reset()
+        if self.regimes is not None:
+            self.regimes.reset()
+
+    def get_state(self):
+        """Return a snapshot of the RNG and process state."""
+        return {
+            "rng": self.rng.bit_generator.state,
+            "volume_rng": self.volume_rng.bit_generator.state,
+            "tick": self.tick,
+            "simulated": self._simulated,
+            "block": None if self._block is None else {name: values.copy() for name, values in self._block.items()},
+            "offset": self._offset,
+            "trend": self._trend,
+            "deviation": self._deviation,
+            "log_close": self._log_close,
+            "innovations": self.innovations.get_state(),
+            "regimes": self.regimes.get_state() if self.regimes is not None else None
+        }
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()."""
+        self.rng.bit_generator.state = state["rng"]
+        self.volume_rng.bit_generator.state = state["volume_rng"]
+        self.tick = state["tick"]
+        self._simulated = state["simulated"]
+        block = state["block"]
+        self._block = None if block is None else {name: values.copy() for name, values in block.items()}
+        self._offset = state["offset"]
+        self._trend = state["trend"]
+        self._deviation = state["deviation"]
+        self._log_close = state["log_close"]
+        self.innovations.set_state(state["innovations"])
+        if self.regimes is not None:
+            self.regimes.set_state(state["regimes"])
+
+    def chunks(self, n_points, chunk_size=None):
+        """Yield ``n_points`` bars as consecutive chunks, e.g. to stream them to disk."""
+        chunk_size = chunk_size or self.chunk_size
+        for start in range(0, n_points, chunk_size):
+            yield self.next_chunk(min(chunk_size, n_points - start))
+
+    def stream(self, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """Yield consecutive chunks of the path indefinitely."""
+        while True:
+            yield self.next_chunk(chunk_size)
+
+    def timestamps(self, n_points, start=0):
+        """Bar open times for ticks ``start`` to ``start + n_points``."""
+        ticks = np.arange(start, start + n_points, dtype=np.int64)
+        return self.start_time + ticks * np.timedelta64(self._interval_ms, "ms")
+
+    def next_chunk(self, n_points):
+        """Return the next ``n_points`` bars of the path as a dict of arrays."""
+        columns = self._allocate(n_points)
+        self._fill(columns)
+        return columns
+
+    def generate_arrays(self, n_points, out=None, progress=None):
+        """
+        Generate ``n_points`` bars into preallocated arrays, chunk by chunk.
+
+        ``out`` may supply the destination arrays, for example views into
+        shared memory; missing columns are allocated. ``progress`` is called
+        with the fraction done after every chunk.
+        """
+        columns = self._allocate(n_points)
+        columns.update(out or {})
+        for start in range(0, n_points, self.chunk_size):
+            stop = min(start + self.chunk_size, n_points)
+            self._fill({name: column[start:stop] for name, column in columns.items()})
+            if progress is not None:
+                progress(stop / n_points)
+        return columns
+
+    def generate(self, n_points, progress=None):
+        """Generate ``n_points`` bars as a Polars DataFrame."""
+        return pl.DataFrame(self.generate_arrays(n_points, progress=progress))
+
+    def _allocate(self, n_points):
+        columns = {name: np.empty(n_points) for name in OHLCV_COLUMNS[1:]}
+        if self.regimes is not None:
+            columns["regime"] = np.empty(n_points, dtype=np.int8)
+        return {"timestamp": np.empty(n_points, dtype="datetime64[ms]"), **columns}
+
+    def _fill(self, columns):
+        """
+        Write the next ticks into the given column views.
+
+        Whole blocks are simulated straight into the views; the ticks of a
+        block that do not fit are kept for the next call.
+        """
+        n = len(columns["close"])
+        done = 0
+        while done < n:
+            if self._block is None and n - done >= _BLOCK_SIZE:
+                self._simulate({name: column[done:done + _BLOCK_SIZE] for name, column in columns.items()})
+                take = _BLOCK_SIZE
+            else:
+                if self._block is None:
+                    self._block = self._allocate(_BLOCK_SIZE)
+                    self._simulate(self._block)
+                    self._offset = 0
+                take = min(_BLOCK_SIZE - self._offset, n - done)
+                for name, column in columns.items():
+                    column[done:done + take] = self._block[name][self._offset:self._offset + take]
+                self._offset += take
+                if self._offset == _BLOCK_SIZE:
+                    self._block = None
+            done += take
+            self.tick += take
+
+    def _simulate(self, columns):
+        """Advance the process by one block of _BLOCK_SIZE ticks, writing into the given column views."""
+        n = len(columns["close"])
+        rng = self.rng
+
+        if self.regimes is None:
+            trend = self._trend + self._step_drift * np.arange(1, n + 1)
+            shocks, step_var = self.innovations.sample(rng, n, self._step_vol)
+        else:
+            regimes = self.regimes.sample(rng, n)
+            trend = np.cumsum(self._regime_drift[regimes])
+            trend += self._trend
+            shocks, step_var = self.innovations.sample(rng, n, self._regime_vol[regimes])
+            columns["regime"][:] = regimes
+
+        # Gaps are rare, so only their positions are sampled
+        gaps = np.zeros(n)
+        n_gaps = rng.binomial(n, self._gap_rate) if self._gap_scale > 0 else 0
+        if n_gaps:
+            positions = rng.integers(0, n, n_gaps)
+            sizes = rng.exponential(self._gap_scale, n_gaps)
+            sizes[rng.random(n_gaps) < 0.5] *= -1.0
+            np.add.at(gaps, positions, sizes)
+            shocks += gaps
+
+        # Ornstein-Uhlenbeck deviation: d[t] = decay * d[t-1] + shock[t]
+        deviation, _ = lfilter([1.0], [1.0, -self._decay], shocks,
+                               zi=[self._decay * self._deviation])
+
+        log_close = self._log_initial + trend + deviation
+        log_open = np.empty(n)
+        log_open[0] = self._log_close
+        log_open[1:] = log_close[:-1]
+        log_open += gaps
+
+        # Extremes of a Brownian bridge from the open to the close
+        move = log_close - log_open
+        move_sq = move * move
+        high_reach = np.sqrt(move_sq + 2.0 * step_var * rng.standard_exponential(n))
+        low_reach = np.sqrt(move_sq + 2.0 * step_var * rng.standard_exponential(n))
+
+        np.exp(log_open, out=columns["open"])
+        np.exp(log_close, out=columns["close"])
+        np.exp(log_open + 0.5 * (move + high_reach), out=columns["high"])
+        np.exp(log_open + 0.5 * (move - low_reach), out=columns["low"])
+        columns["timestamp"][:] = self.timestamps(n, self._simulated)
+        ticks = np.arange(self._simulated, self._simulated + n)
+        self.volume.sample(self.volume_rng, ticks, columns["timestamp"], move, step_var,
+                           columns["volume"])
+
+        self._simulated += n
+        self._trend = trend[-1]
+        self._deviation = deviation[-1]
+        self._log_close = log_close[-1]
+
+
+class InfiniteDataRun:
+    """
+    Start/Pause/Stop/Reset control over an endless stream of fixed-size chunks.
+
+    Only the generator state is kept between chunks, so memory use does not
+    depend on how long the run lasts. Control methods may be called from the
+    GUI thread while another thread pulls chunks: a chunk is either produced
+    completely or not at all, so pausing never loses or duplicates ticks.
+    """
+
+    def __init__(self, generator, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, initial_points=0):
+        self.generator = generator
+        self.chunk_size = int(chunk_size)
+        self.initial_points = int(initial_points)
+        self.state = "stopped"
+        self._lock = threading.Lock()
+        self._halted = threading.Event()
+        self._halted.set()
+
+    @property
+    def tick(self):
+        return self.generator.tick
+
+    @property
+    def is_running(self):
+        return self.state == "running"
+
+    @property
+    def is_live(self):
+        """True once the initial history has been produced."""
+        return self.generator.tick >= self.initial_points
+
+    def start(self):
+        """Start the run, or resume it from the exact tick it was paused at."""
+        with self._lock:
+            self.state = "running"
+            self._halted.clear()
+
+    def pause(self):
+        with self._lock:
+            if self.state == "running":
+                self.state = "paused"
+                self._halted.set()
+
+    def stop(self):
+        """Halt the run; the next start begins a new stream with a fresh seed."""
+        with self._lock:
+            self.state = "stopped"
+            self._halted.set()
+            self.generator.seed_sequence = np.random.SeedSequence()
+            self.generator.reset()
+
+    def reset(self):
+        """Halt the run and rewind to the original seed, replaying the same stream."""
+        with self._lock:
+            self.state = "stopped"
+            self._halted.set()
+            self.generator.reset()
+
+    def next_chunk(self):
+        """
+        Return the next chunk, or None when the run is not running.
+
+        While the initial history is being produced, chunks stop exactly at
+        ``initial_points`` so consumers can tell history from live ticks.
+        """
+        with self._lock:
+            if self.state != "running":
+                return None
+            size = self.chunk_size
+            remaining = self.initial_points - self.generator.tick
+            if 0 < remaining < size:
+                size = remaining
+            return self.generator.next_chunk(size)
+
+    def chunks(self):
+        """Yield chunks for as long as the run stays running."""
+        while True:
+            chunk = self.next_chunk()
+            if chunk is None:
+                return
+            yield chunk
+
+    def run(self, sink, interval=0.0):
+        """
+        Pass chunks to ``sink`` every ``interval`` seconds while the run is running.
+
+        The initial history is passed on as fast as it is generated; only
+        live chunks wait for ``interval``. Meant as the target of a producer
+        thread: each chunk is a fresh dict of arrays handed over as is, and
+        pausing or stopping wakes the wait at once so the thread can be
+        joined without delay.
+        """
+        while True:
+            if self.is_live and self._halted.wait(interval):
+                return
+            chunk = self.next_chunk()
+            if chunk is None:
+                return
+            sink(chunk)
+
+
+def resolve_price_settings(price_settings=None, preset=None):
+    """Merge the defaults, a named Price Settings preset and explicit overrides."""
+    if preset is not None and preset != "Custom":
+        if preset not in PRICE_PRESETS:
+            raise ValueError(f"Unknown price preset: {preset!r}")
+        price_settings = {**PRICE_PRESETS[preset], **(price_settings or {})}
+    return {**DEFAULT_PRICE_SETTINGS, **(price_settings or {})}
+
+
+def _generate_shared_paths(spec, path_indices, seeds, generator_kwargs):
+    """Worker entry point: generate a batch of paths straight into shared memory."""
+    shared = SharedArray.attach(spec)
+    try:
+        n_points = shared.array.shape[-1]
+        timestamps = np.empty(n_points, dtype="datetime64[ms]")
+        for index, seed in zip(path_indices, seeds):
+            out = {name: shared.array[field, index]
+                   for field, name in enumerate(OHLCV_COLUMNS[1:])}
+            out["timestamp"] = timestamps
+            DataGenerator(seed=seed, **generator_kwargs).generate_arrays(n_points, out=out)
+    finally:
+        shared.close()
+    return len(path_indices)
+
+
+def generate_paths(n_paths, n_points, price_settings=None, preset=None, seed=None,
+                   workers=None, as_frame=False, progress=None, **generator_kwargs):
+    """
+    Generate ``n_paths`` independent Monte Carlo paths in a process pool.
+
+    Price and volume settings are passed through to DataGenerator, so paths
+    follow the current Price/Volume panels or a named price ``preset``.
+
+    Every path gets its own child of ``SeedSequence(seed)``, so the result
+    does not depend on the number of workers. Workers write straight into one
+    shared memory block, so no path data is pickled.
+
+    Returns a dict with a 1-D ``timestamp`` array and ``(n_paths, n_points)``
+    OHLCV arrays, or a long Polars DataFrame with a ``path`` column when
+    ``as_frame`` is set. ``progress`` is called with the fraction of paths
+    done as batches complete; an exception it raises cancels the batches
+    that have not started.
+    """
+    generator_kwargs["price_settings"] = resolve_price_settings(price_settings, preset)
+    seeds = np.random.SeedSequence(seed).spawn(n_paths)
+    fields = OHLCV_COLUMNS[1:]
+    workers = min(workers or os.cpu_count() or 1, n_paths)
+
+    shared = SharedArray.create((len(fields), n_paths, n_points))
+    try:
+        # A few batches per worker balance the load without per-path overhead
+        batches = np.array_split(np.arange(n_paths), min(n_paths, workers * 4))
+        pool = process_pool(workers)
+        try:
+            futures = [
+                pool.submit(_generate_shared_paths, shared.spec, batch.tolist(),
+                            [seeds[i] for i in batch], generator_kwargs)
+                for batch in batches if len(batch)
+            ]
+            done = 0
+            for future in as_completed(futures):
+                done += future.result()
+                if progress is not None:
+                    progress(done / n_paths)
+        finally:
+            # Batches still queued are dropped when the loop above is interrupted
+            pool.shutdown(cancel_futures=True)
+        stacked = shared.detach()
+    except BaseException:
+        shared.unlink()
+        raise
+
+    timestamps = DataGenerator(**generator_kwargs).timestamps(n_points)
+    paths = {"timestamp": timestamps}
+    paths.update({name: stacked[field] for field, name in enumerate(fields)})
+    if not as_frame:
+        return paths
+
+    return pl.DataFrame({
+        "path": np.repeat(np.arange(n_paths, dtype=np.uint32), n_points),
+        "timestamp": np.tile(timestamps, n_paths),
+        **{name: paths[name].reshape(-1) for name in fields}
+    })
+
+
+def benchmark(n_points=10_000_000, repeat=3, **kwargs):
+    """Return the best observed generation throughput in points per second."""
+    best = 0.0
+    for _ in range(repeat):
+        generator = DataGenerator(seed=0, **kwargs)
+        start = time.perf_counter()
+        generator.generate_arrays(n_points)
+        best = max(best, n_points / (time.perf_counter() - start))
+    return best
+
+
+if __name__ == "__main__":
+    from .distributions import DISTRIBUTIONS
+
+    for size in (100_000, 1_000_000, 10_000_000):
+        print(f"{size:>12,} points: {benchmark(size):>14,.0f} points/s")
+    for name in DISTRIBUTIONS:
+        rate = benchmark(10_000_000, price_settings={"distribution": name})
+        print(f"{name:>14}: {rate:>14,.0f} points/s")
+    rate = benchmark(10_000_000, price_settings={"regime_switching": True})
+    print(f"{'Regime switching':>14}: {rate:>14,.0f} points/s")
+    for workers in sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        generate_paths(64, 1_000_000, seed=0, workers=workers)
+        rate = 64_000_000 / (time.perf_counter() - start)
+        print(f"{workers:>3} worker(s), 64 paths: {rate:>14,.0f} points/s")
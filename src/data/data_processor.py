@@ -1 +1,629 @@
+"""
+Aggregation of tick data into time bars, and feature engineering.
 
+Bar periods follow the Period combo of the Visualization Controls. Files are
+aggregated with Polars expressions inside a lazy query, so only the bars are
+ever materialised. Ticks held in memory or arriving live go through
+``BarResampler``, which keeps the bars of every period up to date as chunks
+arrive.
+
+Features (returns, lags, rolling statistics, calendar fields, regime labels)
+are declared as a ``FeaturePipeline``, which compiles them into one lazy
+query over the bars or ticks.
+"""
+import functools
+
+import numpy as np
+import polars as pl
+
+from .regimes import REGIMES
+
+# Bar length in milliseconds of each Period combo entry, None for raw ticks
+PERIODS = {
+    "Tick": None,
+    "1 Second": 1_000,
+    "5 Seconds": 5_000,
+    "30 Seconds": 30_000,
+    "1 Minute": 60_000,
+    "5 Minutes": 300_000,
+    "15 Minutes": 900_000,
+    "1 Hour": 3_600_000,
+    "4 Hours": 14_400_000,
+    "1 Day": 86_400_000
+}
+
+# How each OHLCV column combines when ticks are merged into a bar
+BAR_AGGREGATIONS = {
+    "open": lambda column: pl.col(column).first(),
+    "high": lambda column: pl.col(column).max(),
+    "low": lambda column: pl.col(column).min(),
+    "close": lambda column: pl.col(column).last(),
+    "volume": lambda column: pl.col(column).sum()
+}
+
+
+def resample(frame, period_ms, time_column="timestamp"):
+    """
+    Aggregate a time-ordered frame (eager or lazy) into bars of ``period_ms``.
+
+    OHLCV columns combine as open/high/low/close/volume; any other column
+    keeps its last value in the bar. Periods without ticks produce no bar.
+    """
+    if period_ms is None:
+        return frame
+    columns = [name for name in frame.collect_schema().names() if name != time_column]
+    aggregations = [
+        BAR_AGGREGATIONS.get(name, lambda column: pl.col(column).last())(name)
+        for name in columns
+    ]
+    return frame.group_by_dynamic(time_column, every=f"{int(period_ms)}ms").agg(aggregations)
+
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+_INITIAL_CAPACITY = 1024
+
+
+def _tick_columns(ticks, time_column="timestamp"):
+    """Tick times in epoch ms and OHLCV arrays from a frame or a dict of arrays."""
+    if isinstance(ticks, (pl.DataFrame, pl.LazyFrame)):
+        ticks = ticks.lazy().collect() if isinstance(ticks, pl.LazyFrame) else ticks
+        ticks = {name: ticks.get_column(name).to_numpy() for name in ticks.columns}
+    times = np.asarray(ticks[time_column])
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype("datetime64[ms]").view(np.int64)
+    close = np.asarray(ticks["close"], dtype=np.float64)
+    columns = {"close": close}
+    for name in ("open", "high", "low"):
+        columns[name] = np.asarray(ticks[name], dtype=np.float64) if name in ticks else close
+    volume = ticks.get("volume")
+    columns["volume"] = np.zeros(len(close)) if volume is None else np.asarray(volume, dtype=np.float64)
+    return np.asarray(times, dtype=np.int64), columns
+
+
+def _group_starts(keys):
+    """Start index of every run of equal keys."""
+    starts = np.flatnonzero(np.diff(keys)) + 1
+    return np.concatenate(([0], starts)) if len(keys) else starts
+
+
+def aggregate_segments(columns, starts):
+    """OHLCV of the consecutive row segments beginning at ``starts``."""
+    if not len(starts):
+        return {name: np.empty(0) for name in BAR_FIELDS}
+    ends = np.append(starts[1:], len(columns["close"])) - 1
+    return {
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": columns["close"][ends],
+        "volume": np.add.reduceat(columns["volume"], starts)
+    }
+
+
+def aggregate_bars(times, columns, period_ms):
+    """
+    Aggregate time-ordered rows into bars of ``period_ms`` with ``reduceat``.
+
+    Returns the bar open times (epoch ms) and a dict of OHLCV arrays.
+    """
+    buckets = times // period_ms
+    starts = _group_starts(buckets)
+    if len(starts) == len(times):
+        # Every row is a bar of its own, e.g. one-second ticks at one-second bars
+        return buckets * period_ms, {name: columns[name].copy() for name in BAR_FIELDS}
+    return buckets[starts] * period_ms, aggregate_segments(columns, starts)
+
+
+class _BarSeries:
+    """
+    Bars of one period in growable arrays; the last bar is the open one.
+
+    Bars before ``start`` have been dropped: they stay in the arrays until
+    they outnumber the bars kept, which are then moved to the front.
+    """
+
+    def __init__(self, period_ms):
+        self.period_ms = period_ms
+        self.start = 0
+        self.length = 0
+        self.times = np.empty(_INITIAL_CAPACITY, dtype=np.int64)
+        self.fields = {name: np.empty(_INITIAL_CAPACITY) for name in BAR_FIELDS}
+
+    def _reserve(self, length):
+        capacity = len(self.times)
+        if length <= capacity:
+            return
+        while capacity < length:
+            capacity *= 2
+        self.times = np.resize(self.times, capacity)
+        self.fields = {name: np.resize(values, capacity) for name, values in self.fields.items()}
+
+    def truncate(self, length):
+        self.length = length
+
+    def extend(self, times, bars):
+        end = self.length + len(times)
+        self._reserve(end)
+        self.times[self.length:end] = times
+        for name, values in bars.items():
+            self.fields[name][self.length:end] = values
+        self.length = end
+
+    def merge_open_bar(self, bars):
+        """Fold the first of ``bars`` into the open bar, which covers the same period."""
+        last = self.length - 1
+        self.fields["high"][last] = max(self.fields["high"][last], bars["high"][0])
+        self.fields["low"][last] = min(self.fields["low"][last], bars["low"][0])
+        self.fields["close"][last] = bars["close"][0]
+        self.fields["volume"][last] += bars["volume"][0]
+
+    def drop_before(self, index):
+        """Drop the bars before ``index``."""
+        self.start = max(self.start, index)
+        if self.start < self.length - self.start:
+            return
+        kept = self.length - self.start
+        self.times[:kept] = self.times[self.start:self.length]
+        for values in self.fields.values():
+            values[:kept] = values[self.start:self.length]
+        self.start, self.length = 0, kept
+
+    def view(self, start=0):
+        """Zero-copy views of the bars kept from ``start`` on."""
+        start = max(start, self.start)
+        return self.times[start:self.length], {
+            name: values[start:self.length] for name, values in self.fields.items()
+        }
+
+
+class BarResampler:
+    """
+    Maintains OHLCV bars for every period of the Period combo at once.
+
+    Ticks are aggregated into the shortest period with ``reduceat``, and every
+    longer period is built from the one before it, so each tick is touched
+    once whatever the number of periods. New ticks only update the open bar
+    and append new ones: each longer period re-aggregates just the bars that
+    changed in the period below, at most one period ratio of them plus the
+    new ones. Reading the bars of a period returns views of arrays that are
+    already up to date, so switching periods costs nothing.
+
+    With ``max_bars``, each period keeps only its latest ``max_bars`` bars,
+    and those its open bar in the next longer period is built from, so an
+    endless stream is resampled in bounded memory.
+
+    Ticks must arrive in time order, chunk after chunk.
+    """
+
+    def __init__(self, periods=None, time_column="timestamp", max_bars=None):
+        periods = sorted(period for period in (periods or PERIODS).values() if period)
+        for shorter, longer in zip(periods, periods[1:]):
+            if longer % shorter:
+                raise ValueError(f"Period {longer} ms is not a multiple of {shorter} ms")
+        if max_bars is not None and max_bars < 1:
+            raise ValueError(f"max_bars must be at least 1, got {max_bars}")
+        self.time_column = time_column
+        self.max_bars = max_bars
+        self.series = [_BarSeries(period) for period in periods]
+        self.ticks = 0
+
+    def reset(self):
+        self.series = [_BarSeries(series.period_ms) for series in self.series]
+        self.ticks = 0
+
+    def update(self, ticks):
+        """Add a chunk of ticks (a frame or a dict of arrays)."""
+        times, columns = _tick_columns(ticks, self.time_column)
+        if not len(times):
+            return
+        first = self.series[0]
+        if first.length and times[0] < first.times[first.length - 1]:
+            raise ValueError("Ticks must arrive in time order")
+        self.ticks += len(times)
+
+        # Shortest period straight from the ticks, merging into its open bar
+        bar_times, bars = aggregate_bars(times, columns, first.period_ms)
+        dirty = first.length
+        if first.length and bar_times[0] == first.times[first.length - 1]:
+            dirty -= 1
+            first.merge_open_bar(bars)
+            bar_times, bars = bar_times[1:], {name: values[1:] for name, values in bars.items()}
+        first.extend(bar_times, bars)
+
+        # Longer periods from the bars that changed in the period below
+        for shorter, longer in zip(self.series, self.series[1:]):
+            if longer.length:
+                bucket_start = shorter.times[dirty] // longer.period_ms * longer.period_ms
+                kept = int(np.searchsorted(longer.times[:longer.length], bucket_start))
+                source = int(np.searchsorted(shorter.times[:shorter.length], bucket_start))
+            else:
+                kept, source = 0, 0
+            longer.truncate(kept)
+            longer.extend(*aggregate_bars(*shorter.view(source), longer.period_ms))
+            dirty = kept
+
+        if self.max_bars is not None:
+            self._drop_old_bars()
+
+    def _drop_old_bars(self):
+        for shorter, longer in zip(self.series, self.series[1:] + [None]):
+            keep = shorter.length - self.max_bars
+            if longer is not None:
+                # The open bar of the longer period is re-aggregated from these
+                open_bar = longer.times[longer.length - 1]
+                keep = min(keep, int(np.searchsorted(shorter.times[:shorter.length], open_bar)))
+            shorter.drop_before(keep)
+
+    def bars(self, period_ms):
+        """Open times (epoch ms) and OHLCV arrays of the bars of ``period_ms``, as views."""
+        for series in self.series:
+            if series.period_ms == period_ms:
+                return series.view()
+        raise ValueError(f"No bars are kept for a period of {period_ms} ms")
+
+    def frame(self, period_ms):
+        """The bars of ``period_ms`` as a Polars DataFrame."""
+        times, bars = self.bars(period_ms)
+        return pl.DataFrame({self.time_column: times.astype("datetime64[ms]"), **bars})
+
+
+# Information-driven bars, sampled by market activity instead of clock time
+
+def _segment_frame(times, columns, starts, time_column):
+    """Bars over the tick segments beginning at ``starts``, with their tick counts."""
+    return pl.DataFrame({
+        time_column: times[starts].astype("datetime64[ms]"),
+        **aggregate_segments(columns, starts),
+        "ticks": np.diff(np.append(starts, len(times)))
+    })
+
+
+def threshold_starts(values, threshold):
+    """
+    First tick of each bar accumulating ``threshold`` of a per-tick quantity.
+
+    A tick belongs to bar ``k`` when the running total before it lies in
+    ``[k * threshold, (k + 1) * threshold)``, so bar ends come from one
+    cumulative sum instead of a loop over ticks. The tick that crosses a
+    multiple of ``threshold`` closes its bar and its overshoot counts towards
+    the next one; a tick larger than ``threshold`` closes a bar on its own.
+    """
+    if threshold <= 0:
+        raise ValueError("Bar threshold must be positive")
+    before = np.cumsum(values, dtype=np.float64)
+    before -= values
+    before /= threshold
+    np.floor(before, out=before)
+    return _group_starts(before)
+
+
+def volume_bars(ticks, threshold, time_column="timestamp"):
+    """Bars of ``threshold`` traded volume each."""
+    times, columns = _tick_columns(ticks, time_column)
+    return _segment_frame(times, columns, threshold_starts(columns["volume"], threshold), time_column)
+
+
+def dollar_bars(ticks, threshold, time_column="timestamp"):
+    """Bars of ``threshold`` traded value (close times volume) each."""
+    times, columns = _tick_columns(ticks, time_column)
+    starts = threshold_starts(columns["close"] * columns["volume"], threshold)
+    return _segment_frame(times, columns, starts, time_column)
+
+
+def tick_rule(close):
+    """
+    Aggressor side of each tick from its price change: +1 up, -1 down.
+
+    Unchanged prices carry the previous sign; ticks before the first change
+    get 0.
+    """
+    signs = np.sign(np.diff(close, prepend=close[:1])).astype(np.int8)
+    last_change = np.where(signs != 0, np.arange(len(signs)), 0)
+    np.maximum.accumulate(last_change, out=last_change)
+    return signs[last_change]
+
+
+def _imbalance_loop(signs, expected_ticks, expected_sign, alpha, low, high):
+    """
+    The bar-by-bar search behind ``imbalance_starts``.
+
+    Plain Python on scalars and arrays, so numba can compile it as is and it
+    still runs interpreted when checking the compiled version.
+    """
+    n = len(signs)
+    starts = np.empty(n, dtype=np.int64)
+    starts[0] = 0
+    count = 1
+    start = 0
+    total = 0
+    threshold = max(expected_ticks * abs(expected_sign), 1.0)
+    for i in range(n):
+        total += signs[i]
+        if abs(total) < threshold:
+            continue
+        if i + 1 >= n:
+            # The last bar is still open
+            break
+        length = i - start + 1
+        expected_ticks += alpha * (length - expected_ticks)
+        expected_ticks = min(max(expected_ticks, low), high)
+        expected_sign += alpha * (total / length - expected_sign)
+        start = i + 1
+        starts[count] = start
+        count += 1
+        total = 0
+        threshold = max(expected_ticks * abs(expected_sign), 1.0)
+    return starts[:count]
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_imbalance_loop():
+    """``_imbalance_loop`` compiled by numba; numba is only imported when it is used."""
+    import numba
+
+    return numba.njit(cache=True, error_model="numpy")(_imbalance_loop)
+
+
+def imbalance_starts(signs, initial_ticks=1000, alpha=0.1, ticks_range=10.0):
+    """
+    First tick of each tick-imbalance bar.
+
+    A bar closes at the first tick where the absolute sum of its signs
+    reaches ``E[T] * |E[b]|``. E[T] (the expected bar length) and E[b] (the
+    expected sign per tick) are exponentially weighted averages over the
+    closed bars with weight ``alpha``, seeded from ``initial_ticks``. E[T] is
+    kept within a factor ``ticks_range`` of ``initial_ticks``, as the
+    thresholds otherwise tend to collapse or run away.
+
+    Bars depend on each other through the averages, so they are found one
+    at a time, in a single pass over the ticks compiled with numba.
+    """
+    signs = np.asarray(signs, dtype=np.int64)
+    if not len(signs):
+        return np.empty(0, dtype=np.int64)
+    loop = _compiled_imbalance_loop()
+    return loop(signs, float(initial_ticks), float(np.mean(signs[:initial_ticks])), float(alpha),
+                float(initial_ticks / ticks_range), float(initial_ticks * ticks_range))
+
+
+def tick_imbalance_bars(ticks, initial_ticks=1000, alpha=0.1, time_column="timestamp"):
+    """Tick-imbalance bars, which close once buying or selling pressure is unusually one-sided."""
+    times, columns = _tick_columns(ticks, time_column)
+    starts = imbalance_starts(tick_rule(columns["close"]), initial_ticks, alpha)
+    return _segment_frame(times, columns, starts, time_column)
+
+
+def bar_threshold(values, ticks_per_bar):
+    """Threshold giving bars of ``ticks_per_bar`` ticks on average."""
+    return float(np.mean(values)) * ticks_per_bar
+
+
+DEFAULT_TICKS_PER_BAR = 100
+
+INFORMATION_BARS = {
+    "volume": (volume_bars, lambda columns: columns["volume"]),
+    "dollar": (dollar_bars, lambda columns: columns["close"] * columns["volume"]),
+    "tick_imbalance": (tick_imbalance_bars, None)
+}
+
+
+def information_bars(ticks, kind, ticks_per_bar=DEFAULT_TICKS_PER_BAR, time_column="timestamp"):
+    """
+    Volume, dollar or tick-imbalance bars averaging about ``ticks_per_bar`` ticks.
+
+    Thresholds are derived from the ticks themselves, so the same call
+    serves plots and backtests on any dataset.
+    """
+    try:
+        build, quantity = INFORMATION_BARS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown bar type: {kind!r}") from None
+    if quantity is None:
+        return build(ticks, initial_ticks=ticks_per_bar, time_column=time_column)
+    _, columns = _tick_columns(ticks, time_column)
+    return build(ticks, bar_threshold(quantity(columns), ticks_per_bar), time_column)
+
+
+# Feature engineering, compiled into one lazy query
+
+class _Features:
+    """What a Feature can see while building its expressions."""
+
+    def __init__(self, schema, time_column):
+        self.schema = schema
+        self.time_column = time_column
+        self.stages = {}  # Feature name -> index of the with_columns stage computing it
+        self.needed = 0
+
+    def col(self, name):
+        """The column ``name``, from the source frame or an earlier feature."""
+        if name in self.stages:
+            self.needed = max(self.needed, self.stages[name] + 1)
+        elif name not in self.schema:
+            raise ValueError(f"No column or earlier feature named {name!r}")
+        return pl.col(name)
+
+    def time(self):
+        """The time column as a datetime, whether it holds datetimes or epoch ms."""
+        column = pl.col(self.time_column)
+        return column if self.schema[self.time_column].is_temporal() else column.cast(pl.Datetime("ms"))
+
+
+class Feature:
+    """
+    A group of feature columns.
+
+    ``expressions(features)`` returns ``{name: expression}``, building on the
+    source columns and on features defined earlier in the pipeline through
+    ``features.col(name)``.
+    """
+
+    def expressions(self, features):
+        raise NotImplementedError
+
+
+class Returns(Feature):
+    """Simple returns of ``column`` over ``periods`` rows."""
+
+    def __init__(self, column="close", periods=1, name=None):
+        self.column, self.periods = column, int(periods)
+        self.name = name or ("return" if self.periods == 1 else f"return_{self.periods}")
+
+    def expressions(self, features):
+        return {self.name: features.col(self.column).pct_change(self.periods)}
+
+
+class LogReturns(Feature):
+    """Log returns of ``column`` over ``periods`` rows."""
+
+    def __init__(self, column="close", periods=1, name=None):
+        self.column, self.periods = column, int(periods)
+        self.name = name or ("log_return" if self.periods == 1 else f"log_return_{self.periods}")
+
+    def expressions(self, features):
+        return {self.name: features.col(self.column).log().diff(self.periods)}
+
+
+class Lags(Feature):
+    """``column`` shifted back by each of ``lags`` rows, as ``<column>_lag_<k>``."""
+
+    def __init__(self, column="log_return", lags=(1, 2, 3)):
+        self.column, self.lags = column, tuple(int(lag) for lag in lags)
+
+    def expressions(self, features):
+        source = features.col(self.column)
+        return {f"{self.column}_lag_{lag}": source.shift(lag) for lag in self.lags}
+
+
+class Rolling(Feature):
+    """
+    Rolling statistics of ``column`` over ``window`` rows, as
+    ``<column>_<stat>_<window>``. ``stats`` are names of Polars rolling
+    methods: mean, std, var, min, max, sum, median or skew.
+    """
+
+    def __init__(self, column="log_return", window=20, stats=("mean", "std")):
+        self.column, self.window, self.stats = column, int(window), tuple(stats)
+
+    def expressions(self, features):
+        source = features.col(self.column)
+        return {f"{self.column}_{stat}_{self.window}": getattr(source, f"rolling_{stat}")(self.window)
+                for stat in self.stats}
+
+
+class Calendar(Feature):
+    """Calendar fields of the time column, e.g. hour, minute, weekday, day or month."""
+
+    def __init__(self, fields=("hour", "weekday")):
+        self.fields = tuple(fields)
+
+    def expressions(self, features):
+        time = features.time()
+        return {field: getattr(time.dt, field)() for field in self.fields}
+
+
+class VolatilityRatio(Feature):
+    """
+    Rolling volatility of ``column``'s log returns over ``window`` rows,
+    relative to its rolling mean over ``baseline`` rows.
+    """
+
+    def __init__(self, window=100, baseline=2000, column="close", name="volatility_ratio"):
+        self.window, self.baseline, self.column, self.name = int(window), int(baseline), column, name
+
+    def expressions(self, features):
+        volatility = features.col(self.column).log().diff().rolling_std(self.window)
+        return {self.name: volatility / volatility.rolling_mean(self.baseline, min_samples=1)}
+
+
+class RegimeLabels(Feature):
+    """
+    Market regime of every row as a ``REGIMES`` Enum.
+
+    Data generated with regime switching carries the sampled regime in its
+    ``regime`` column, which is used as is. Otherwise rows are labelled from
+    the ``ratio`` column of a VolatilityRatio feature: above ``high`` is High
+    Volatility, below ``low`` Low Volatility, and anything between Normal.
+    """
+
+    def __init__(self, name="regime_label", ratio="volatility_ratio", low=0.75, high=1.5):
+        self.name, self.ratio, self.low, self.high = name, ratio, low, high
+
+    def expressions(self, features):
+        labels = pl.Enum(REGIMES)
+        if "regime" in features.schema:
+            return {self.name: pl.col("regime").replace_strict(range(len(REGIMES)), REGIMES, return_dtype=labels)}
+        ratio = features.col(self.ratio)
+        label = (pl.when(ratio > self.high).then(pl.lit("High Volatility"))
+                 .when(ratio < self.low).then(pl.lit("Low Volatility"))
+                 .when(ratio.is_not_null()).then(pl.lit("Normal")))
+        return {self.name: label.cast(labels)}
+
+
+class FeaturePipeline:
+    """
+    Declarative feature engineering over an OHLCV frame.
+
+    Features are declared in order, and each may build on those before it by
+    name. All of them compile into one lazy query: a feature is placed in
+    the first ``with_columns`` stage after the features it reads, so the
+    stages are as few as the longest chain of dependencies (two for the
+    default pipeline: log returns, then their lags and rolling statistics).
+    Polars evaluates the expressions of a stage in parallel and materialises
+    the frame once at the end, instead of copying it after every step.
+
+    With ``drop_warmup`` set, rows where any feature is still null (the
+    first rows of returns, lags and rolling windows) are dropped.
+    """
+
+    def __init__(self, features, time_column="timestamp", drop_warmup=False):
+        self.features = list(features)
+        self.time_column = time_column
+        self.drop_warmup = drop_warmup
+
+    def stages(self, schema):
+        """
+        ``{name: expression}`` dicts of each stage for a source frame with
+        ``schema``, and the feature names in declaration order.
+        """
+        features = _Features(schema, self.time_column)
+        stages = []
+        for feature in self.features:
+            features.needed = 0
+            expressions = feature.expressions(features)
+            if features.needed == len(stages):
+                stages.append({})
+            stages[features.needed].update(expressions)
+            features.stages.update(dict.fromkeys(expressions, features.needed))
+        return stages, list(features.stages)
+
+    def plan(self, frame):
+        """The lazy query adding every feature to ``frame`` (eager or lazy)."""
+        plan = frame.lazy()
+        source = plan.collect_schema().names()
+        stages, names = self.stages(plan.collect_schema())
+        for expressions in stages:
+            plan = plan.with_columns(**expressions)
+        if self.drop_warmup:
+            plan = plan.drop_nulls(names)
+        # Features in declaration order, whatever stage computed them
+        return plan.select(*[name for name in source if name not in names], *names)
+
+    def apply(self, frame):
+        """``frame`` with every feature added, as a DataFrame."""
+        return self.plan(frame).collect()
+
+
+def default_pipeline(time_column="timestamp", drop_warmup=False):
+    """Returns, five lags and rolling statistics of log returns, calendar fields and regime labels"""
+    return FeaturePipeline([
+        Returns(),
+        LogReturns(),
+        Lags("log_return", range(1, 6)),
+        Rolling("log_return", 20, ("mean", "std")),
+        Rolling("log_return", 100, ("std",)),
+        Rolling("close", 20, ("min", "max")),
+        Calendar(("hour", "weekday")),
+        VolatilityRatio(),
+        RegimeLabels()
+    ], time_column, drop_warmup)
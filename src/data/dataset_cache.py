@@ -0,0 +1,159 @@
+"""
+On-disk cache of generated datasets.
+
+A generated dataset is fully determined by the generator's settings, seed,
+tick interval, start time and length, so it is stored under a hash of
+exactly those. Entries are uncompressed Arrow IPC files written as a single
+record batch: a cache hit memory-maps the file through ``LazyDataset``
+and its columns are views on the mapping, so regenerating a dataset that
+took minutes costs about as much as opening a file. Entries are evicted
+least recently used first once the cache outgrows its byte budget; a hit
+touches the file, so modification times give the usage order.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .data_loader import LazyDataset, save_dataset
+
+DEFAULT_DIRECTORY = Path.home() / ".synthetic_data_lab" / "datasets"
+DEFAULT_MAX_BYTES = 1000 << 20
+SUFFIX = ".arrow"
+
+# Bump whenever the generator produces different data for the same settings,
+# so entries written by older versions are never served. Version 2: paths are
+# simulated in fixed blocks, which changed every path. Version 3: the GARCH
+# variance runs in float64.
+CACHE_VERSION = 3
+
+
+def _json_default(value):
+    if isinstance(value, np.datetime64):
+        return str(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot hash a setting of type {type(value).__name__}")
+
+
+def dataset_key(generator, n_points):
+    """
+    Hex digest identifying the first ``n_points`` bars a fresh ``generator`` produces.
+
+    The generator's ``chunk_size`` is left out on purpose: the path does not
+    depend on how it is chunked, so every chunk size shares one entry.
+    """
+    description = {
+        "version": CACHE_VERSION,
+        "n_points": int(n_points),
+        "price_settings": generator.price_settings,
+        "volume_settings": generator.volume.volume_settings,
+        "seed": [generator.seed_sequence.entropy, list(generator.seed_sequence.spawn_key)],
+        "tick_interval": generator.tick_interval,
+        "start_time": generator.start_time
+    }
+    text = json.dumps(description, sort_keys=True, default=_json_default)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class DatasetCache:
+    """
+    Generated datasets on disk, keyed by ``dataset_key``.
+
+    ``load`` returns a memory-mapped frame, or None on a miss; ``store``
+    writes an entry and evicts the least recently used ones beyond
+    ``max_bytes``. Entries larger than the whole budget are not stored.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return self.directory / f"{key}{SUFFIX}"
+
+    def entries(self):
+        """``(path, size)`` of every entry, least recently used first."""
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, path, stat.st_size))
+        return [(path, size) for _, path, size in sorted(entries)]
+
+    @property
+    def size_bytes(self):
+        return sum(size for _, size in self.entries())
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            data = LazyDataset(path, format="ipc").load()
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Unreadable entry, e.g. left by a crash; drop it and regenerate
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def store(self, key, data):
+        """Write ``data`` under ``key``; returns whether it was cached."""
+        if data.estimated_size() > self.max_bytes:
+            return False
+        path = self.path(key)
+        partial = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.partial")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # One record batch, so every column maps as one contiguous array
+            save_dataset(data, partial, format="ipc", compression=None, row_group_size=max(len(data), 1))
+            os.replace(partial, path)
+        except OSError:
+            self._remove(partial)
+            return False
+        # The new entry is the most recently used, so it goes last
+        self.evict()
+        return path.exists()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size in entries)
+            for path, size in entries:
+                if total <= self.max_bytes:
+                    break
+                if self._remove(path):
+                    total -= size
+
+    def resize(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self.evict()
+
+    def clear(self):
+        with self._lock:
+            for path, _ in self.entries():
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError:
+            # Still mapped on platforms that refuse to delete open files
+            return False
@@ -0,0 +1,212 @@
+"""
+Innovation distributions for the price generator.
+
+Each distribution is a batched sampler: ``sample(rng, n, scale)`` draws the
+log-price shocks of ``n`` consecutive ticks in one call and returns them
+together with the per-tick diffusion variance used for intra-bar extremes.
+``scale`` is the per-tick volatility, either a scalar or an array of length
+``n``. Samplers with memory (GARCH) carry their state across calls, so a path
+generated chunk by chunk stays continuous.
+"""
+import functools
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+
+class Innovations:
+    """Base class for innovation samplers listed in the Distribution combo."""
+
+    name = None
+
+    def __init__(self, tick_interval=1.0):
+        self.tick_interval = float(tick_interval)
+
+    def sample(self, rng, n, scale):
+        raise NotImplementedError
+
+    def reset(self):
+        """Return to the initial state of the process."""
+
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+
+class NormalInnovations(Innovations):
+    """Gaussian shocks, the geometric Brownian motion baseline."""
+
+    name = "Normal"
+
+    def sample(self, rng, n, scale):
+        shocks = rng.standard_normal(n)
+        shocks *= scale
+        return shocks, scale * scale
+
+
+class StudentTInnovations(Innovations):
+    """Fat-tailed Student-t shocks, rescaled to unit variance."""
+
+    name = "Student-t"
+
+    def __init__(self, tick_interval=1.0, df=4.0):
+        super().__init__(tick_interval)
+        if df <= 2:
+            raise ValueError("Student-t innovations need df > 2 for a finite variance")
+        self.df = float(df)
+        self._unit = np.sqrt((self.df - 2.0) / self.df)
+
+    def sample(self, rng, n, scale):
+        shocks = rng.standard_t(self.df, n)
+        shocks *= self._unit * scale
+        return shocks, scale * scale
+
+
+class SkewedNormalInnovations(Innovations):
+    """Skew-normal shocks, standardised to zero mean and unit variance."""
+
+    name = "Skewed Normal"
+
+    def __init__(self, tick_interval=1.0, skew=-4.0):
+        super().__init__(tick_interval)
+        self.skew = float(skew)
+        self._delta = self.skew / np.sqrt(1.0 + self.skew ** 2)
+        self._mean = self._delta * np.sqrt(2.0 / np.pi)
+        self._std = np.sqrt(1.0 - self._mean ** 2)
+
+    def sample(self, rng, n, scale):
+        # Azzalini's representation: delta * |u0| + sqrt(1 - delta^2) * u1
+        shocks = np.abs(rng.standard_normal(n))
+        shocks *= self._delta
+        shocks += np.sqrt(1.0 - self._delta ** 2) * rng.standard_normal(n)
+        shocks -= self._mean
+        shocks *= scale / self._std
+        return shocks, scale * scale
+
+
+class JumpDiffusionInnovations(Innovations):
+    """
+    Merton jump diffusion: Gaussian shocks plus rare log-normal jumps.
+
+    Jumps are sparse, so only their count and positions are sampled. The
+    expected jump return is compensated so the drift setting keeps its meaning.
+    """
+
+    name = "Jump Diffusion"
+
+    def __init__(self, tick_interval=1.0, jump_intensity=4.0, jump_mean=0.0, jump_std=1.5):
+        super().__init__(tick_interval)
+        self.jump_intensity = float(jump_intensity)  # Expected jumps per day
+        self.jump_mean = jump_mean / 100.0
+        self.jump_std = jump_std / 100.0
+        self._rate = min(self.jump_intensity * self.tick_interval / SECONDS_PER_DAY, 1.0)
+        self._compensator = self._rate * np.expm1(self.jump_mean + 0.5 * self.jump_std ** 2)
+
+    def sample(self, rng, n, scale):
+        shocks = rng.standard_normal(n)
+        shocks *= scale
+        shocks -= self._compensator
+        n_jumps = rng.binomial(n, self._rate)
+        if n_jumps:
+            positions = rng.integers(0, n, n_jumps)
+            np.add.at(shocks, positions, rng.normal(self.jump_mean, self.jump_std, n_jumps))
+        return shocks, scale * scale
+
+
+# Length of every array the GARCH scan sees; shorter draws are padded, so one
+# compiled kernel serves every call
+GARCH_CHUNK = 1 << 16
+
+
+@functools.lru_cache(maxsize=None)
+def _garch_kernel():
+    """Build the jit-compiled GARCH variance scan; JAX is only imported when GARCH is used."""
+    import jax
+    import jax.numpy as jnp
+    from jax import lax
+
+    @jax.jit
+    def variance_path(coefficients, omega, h0, n):
+        # Steps past ``n`` are padding and leave the carried variance unchanged
+        def step(h, inputs):
+            coefficient, valid = inputs
+            return jnp.where(valid, omega + coefficient * h, h), h
+        valid = jnp.arange(coefficients.shape[0]) < n
+        return lax.scan(step, h0, (coefficients, valid), unroll=8)
+
+    return variance_path
+
+
+class GarchInnovations(Innovations):
+    """
+    GARCH(1, 1) shocks with variance normalised to the volatility setting.
+
+    The normalised conditional variance follows
+    ``h[t+1] = (1 - alpha - beta) + (alpha * z[t]**2 + beta) * h[t]``. Once the
+    standard normal draws ``z`` are known, this is a linear recursion, and a
+    compiled ``lax.scan`` runs it for the whole chunk. The scan runs in
+    float64, like the rest of the generator, so the carried variance does not
+    pick up float32 rounding over millions of ticks. It always sees arrays of
+    ``GARCH_CHUNK`` values, padding the last one, so it compiles only once.
+    """
+
+    name = "GARCH"
+
+    def __init__(self, tick_interval=1.0, alpha=0.08, beta=0.9):
+        super().__init__(tick_interval)
+        if alpha < 0 or beta < 0 or alpha + beta >= 1:
+            raise ValueError("GARCH needs alpha, beta >= 0 and alpha + beta < 1")
+        self.alpha = float(alpha)
+        self.beta = float(beta)
+        self.omega = 1.0 - self.alpha - self.beta
+        self.reset()
+
+    def reset(self):
+        self._variance = 1.0
+
+    def get_state(self):
+        return {"variance": self._variance}
+
+    def set_state(self, state):
+        self._variance = state["variance"]
+
+    def sample(self, rng, n, scale):
+        import jax
+
+        z = rng.standard_normal(n)
+        coefficients = np.empty(-(-n // GARCH_CHUNK) * GARCH_CHUNK)
+        coefficients[n:] = 0.0
+        np.multiply(z, z, out=coefficients[:n])
+        coefficients[:n] *= self.alpha
+        coefficients[:n] += self.beta
+        variance = np.empty(n)
+        kernel = _garch_kernel()
+        with jax.enable_x64(True):
+            for start in range(0, n, GARCH_CHUNK):
+                stop = min(start + GARCH_CHUNK, n)
+                last, path = kernel(coefficients[start:start + GARCH_CHUNK], self.omega,
+                                    self._variance, stop - start)
+                self._variance = float(last)
+                variance[start:stop] = np.asarray(path)[:stop - start]
+        variance *= scale * scale
+        z *= np.sqrt(variance)
+        return z, variance
+
+
+DISTRIBUTIONS = {
+    cls.name: cls
+    for cls in (NormalInnovations, StudentTInnovations, SkewedNormalInnovations,
+                JumpDiffusionInnovations, GarchInnovations)
+}
+
+
+def make_innovations(name, tick_interval=1.0, **params):
+    """Instantiate the sampler for a Distribution combo entry."""
+    try:
+        cls = DISTRIBUTIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown price distribution: {name!r}") from None
+    return cls(tick_interval, **params)
@@ -0,0 +1,215 @@
+"""
+Preset parameter sets for the Price Settings and Volume Settings groups.
+
+Kept free of Qt so data generation can resolve presets by name in worker
+processes as well as in the UI.
+"""
+
+PRICE_PRESETS = {
+    # Market Behavior Presets
+    "Strong Uptrend": {
+        "initial_price": 25000.0,
+        "volatility": 35.0,        # Moderate volatility for trending market
+        "drift": 85.0,             # Strong positive drift
+        "mean_reversion": 0.05,     # Low mean reversion in trend
+        "market_regime": "Bull Market",
+        "distribution": "Skewed Normal",
+        "gap_probability": 0.03,    # Occasional gaps
+        "gap_size": 2.0            # Moderate gaps
+    },
+    "Strong Downtrend": {
+        "initial_price": 25000.0,
+        "volatility": 45.0,        # Higher volatility in downtrends
+        "drift": -75.0,            # Strong negative drift
+        "mean_reversion": 0.05,     # Low mean reversion in trend
+        "market_regime": "Bear Market",
+        "distribution": "Skewed Normal",
+        "gap_probability": 0.05,    # More frequent gaps in downtrends
+        "gap_size": 2.5            # Slightly larger gaps
+    },
+    "High Volatility": {
+        "initial_price": 25000.0,
+        "volatility": 75.0,        # High volatility
+        "drift": 0.0,              # No directional bias
+        "mean_reversion": 0.08,     # Low mean reversion
+        "market_regime": "High Volatility",
+        "distribution": "Student-t",
+        "gap_probability": 0.08,    # Frequent gaps
+        "gap_size": 3.5            # Large gaps
+    },
+    "Low Volatility": {
+        "initial_price": 25000.0,
+        "volatility": 8.0,         # Very low volatility
+        "drift": 4.0,              # Slight upward drift
+        "mean_reversion": 0.20,     # Higher mean reversion
+        "market_regime": "Low Volatility",
+        "distribution": "Normal",
+        "gap_probability": 0.01,    # Very rare gaps
+        "gap_size": 0.5            # Small gaps
+    },
+    "Mean Reverting": {
+        "initial_price": 25000.0,
+        "volatility": 25.0,        # Moderate volatility
+        "drift": 0.0,              # No drift
+        "mean_reversion": 0.40,     # Strong mean reversion
+        "market_regime": "Normal",
+        "distribution": "Normal",
+        "gap_probability": 0.02,    # Rare gaps
+        "gap_size": 1.0            # Small gaps
+    },
+    "Flash Crash": {
+        "initial_price": 25000.0,
+        "volatility": 150.0,       # Extreme volatility
+        "drift": -200.0,           # Severe downward drift
+        "mean_reversion": 0.02,     # Almost no mean reversion
+        "market_regime": "Crisis",
+        "distribution": "Jump Diffusion",
+        "gap_probability": 0.25,    # Very frequent gaps
+        "gap_size": 8.0            # Very large gaps
+    },
+    "Bubble Formation": {
+        "initial_price": 25000.0,
+        "volatility": 65.0,        # High volatility
+        "drift": 150.0,            # Extreme upward drift
+        "mean_reversion": 0.03,     # Very low mean reversion
+        "market_regime": "Bull Market",
+        "distribution": "Student-t",
+        "gap_probability": 0.10,    # Frequent gaps
+        "gap_size": 4.0            # Large gaps
+    },
+    "Range Bound": {
+        "initial_price": 25000.0,
+        "volatility": 15.0,        # Low volatility
+        "drift": 0.0,              # No drift
+        "mean_reversion": 0.35,     # Strong mean reversion
+        "market_regime": "Normal",
+        "distribution": "Normal",
+        "gap_probability": 0.02,    # Rare gaps
+        "gap_size": 1.0            # Small gaps
+    },
+    "News Event": {
+        "initial_price": 25000.0,
+        "volatility": 55.0,        # High volatility
+        "drift": 0.0,              # No directional bias
+        "mean_reversion": 0.10,     # Low mean reversion
+        "market_regime": "High Volatility",
+        "distribution": "Jump Diffusion",
+        "gap_probability": 0.15,    # Frequent gaps
+        "gap_size": 5.0            # Large gaps
+    },
+    # Asset Type Presets
+    "Stable Large Cap": {
+        "initial_price": 150.0,
+        "volatility": 12.0,        # Low volatility
+        "drift": 8.0,              # Moderate upward drift
+        "mean_reversion": 0.15,     # Moderate mean reversion
+        "market_regime": "Normal",
+        "distribution": "Normal",
+        "gap_probability": 0.01,    # Very rare gaps
+        "gap_size": 0.8            # Small gaps
+    },
+    "Volatile Small Cap": {
+        "initial_price": 25.0,
+        "volatility": 45.0,        # High volatility
+        "drift": 15.0,             # Strong growth potential
+        "mean_reversion": 0.08,     # Low mean reversion
+        "market_regime": "High Volatility",
+        "distribution": "Student-t",
+        "gap_probability": 0.05,    # Moderate gap frequency
+        "gap_size": 3.5            # Large gaps
+    }
+}
+
+VOLUME_PRESETS = {
+    # Standard Market Patterns
+    "U-Shape Pattern": {
+        "base_volume": 1500000,     # Moderate base volume
+        "volatility": 35.0,         # Moderate volatility
+        "trend": 0.0,               # No trend
+        "pattern": "U-Shape (Day)",  # Classic U-shaped pattern
+        "profile": "Balanced",       # Even buy/sell distribution
+        "spike_probability": 0.03,   # Occasional spikes
+        "spike_multiplier": 2.0      # Moderate spike size
+    },
+    "Institutional Trading": {
+        "base_volume": 3500000,     # High base volume
+        "volatility": 45.0,         # Moderate-high volatility
+        "trend": 10.0,              # Slight upward trend
+        "pattern": "Block Trading",  # Large block trades
+        "profile": "Top Heavy",      # More buying pressure
+        "spike_probability": 0.08,   # Regular block trades
+        "spike_multiplier": 4.0      # Large blocks
+    },
+    "Retail Trading": {
+        "base_volume": 800000,      # Lower base volume
+        "volatility": 55.0,         # Higher volatility
+        "trend": 0.0,               # No clear trend
+        "pattern": "Random",         # Random retail flow
+        "profile": "Multi-Modal",    # Multiple trading waves
+        "spike_probability": 0.05,   # Moderate spikes
+        "spike_multiplier": 2.5      # Smaller spikes
+    },
+    "Opening Hour": {
+        "base_volume": 2500000,     # High opening volume
+        "volatility": 65.0,         # High volatility
+        "trend": 25.0,              # Strong initial surge
+        "pattern": "Front Loaded",   # Heavy opening volume
+        "profile": "Multi-Modal",    # Multiple opening waves
+        "spike_probability": 0.15,   # Frequent spikes
+        "spike_multiplier": 3.0      # Significant spikes
+    },
+    "Closing Hour": {
+        "base_volume": 2800000,     # High closing volume
+        "volatility": 60.0,         # High volatility
+        "trend": 35.0,              # Increasing into close
+        "pattern": "Back Loaded",    # Heavy closing volume
+        "profile": "Multi-Modal",    # Multiple closing waves
+        "spike_probability": 0.12,   # Regular spikes
+        "spike_multiplier": 3.5      # Large spikes
+    },
+    "Low Liquidity": {
+        "base_volume": 150000,      # Very low base volume
+        "volatility": 85.0,         # Very high volatility
+        "trend": -15.0,             # Declining trend
+        "pattern": "Random",         # Sporadic trading
+        "profile": "Bottom Heavy",   # More selling pressure
+        "spike_probability": 0.04,   # Rare but impactful spikes
+        "spike_multiplier": 5.0      # Very large spikes when they occur
+    },
+    "High Liquidity": {
+        "base_volume": 5000000,     # Very high base volume
+        "volatility": 25.0,         # Lower volatility
+        "trend": 5.0,               # Slight upward trend
+        "pattern": "U-Shape (Day)",  # Classic pattern
+        "profile": "Balanced",       # Even distribution
+        "spike_probability": 0.10,   # Regular small spikes
+        "spike_multiplier": 1.8      # Small spikes
+    },
+    "News Impact": {
+        "base_volume": 4000000,     # High news-driven volume
+        "volatility": 95.0,         # Very high volatility
+        "trend": 50.0,              # Strong volume surge
+        "pattern": "Random",         # Unpredictable flow
+        "profile": "Multi-Modal",    # Multiple volume waves
+        "spike_probability": 0.20,   # Very frequent spikes
+        "spike_multiplier": 4.5      # Large spikes
+    },
+    "Earnings Release": {
+        "base_volume": 4500000,     # Very high event volume
+        "volatility": 100.0,        # Extreme volatility
+        "trend": 65.0,              # Strong volume increase
+        "pattern": "Front Loaded",   # Heavy initial volume
+        "profile": "Multi-Modal",    # Multiple waves
+        "spike_probability": 0.25,   # Very frequent spikes
+        "spike_multiplier": 5.0      # Very large spikes
+    },
+    "Market Maker": {
+        "base_volume": 2000000,     # Steady base volume
+        "volatility": 20.0,         # Low volatility
+        "trend": 0.0,               # No trend
+        "pattern": "U-Shape (Day)",  # Standard pattern
+        "profile": "Balanced",       # Market making balance
+        "spike_probability": 0.06,   # Regular small spikes
+        "spike_multiplier": 1.5      # Small, controlled spikes
+    }
+}
@@ -0,0 +1,120 @@
+"""
+Markov regime switching over the Market Regime options.
+
+Regime paths are sampled segment by segment: one holding time and one jump
+per regime change, drawn in blocks. The generator then maps the per-tick
+regime indices to drift and volatility arrays with plain fancy indexing, so
+no per-tick branching is involved.
+"""
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+# Order matches the market_regime combo in Ui_MainWindow
+REGIMES = ("Normal", "Bull Market", "Bear Market", "High Volatility", "Low Volatility", "Crisis")
+
+# Drift offset (annualised %) and volatility multiplier relative to the Normal regime
+REGIME_PARAMETERS = {
+    "Normal": (0.0, 1.0),
+    "Bull Market": (40.0, 0.9),
+    "Bear Market": (-40.0, 1.3),
+    "High Volatility": (0.0, 2.0),
+    "Low Volatility": (0.0, 0.5),
+    "Crisis": (-150.0, 3.0)
+}
+
+# Daily transition probabilities, rows and columns in REGIMES order
+REGIME_TRANSITIONS = np.array([
+    # Normal  Bull   Bear   HighV  LowV   Crisis
+    [0.950, 0.015, 0.015, 0.008, 0.010, 0.002],  # Normal
+    [0.025, 0.965, 0.002, 0.004, 0.003, 0.001],  # Bull Market
+    [0.030, 0.002, 0.950, 0.010, 0.002, 0.006],  # Bear Market
+    [0.100, 0.010, 0.040, 0.820, 0.005, 0.025],  # High Volatility
+    [0.050, 0.010, 0.003, 0.002, 0.935, 0.000],  # Low Volatility
+    [0.050, 0.000, 0.150, 0.200, 0.000, 0.600]   # Crisis
+])
+
+_SEGMENT_BLOCK = 64
+
+
+def regime_parameters(selected, drift, volatility):
+    """
+    Annualised drift and volatility (%) for every regime, in REGIMES order.
+
+    The Price Settings describe the selected regime, so the Normal baseline
+    is backed out from it and every other regime is derived from that baseline.
+    """
+    offset, multiplier = REGIME_PARAMETERS[selected]
+    base_drift = drift - offset
+    base_volatility = volatility / multiplier
+    drifts = np.array([base_drift + REGIME_PARAMETERS[name][0] for name in REGIMES])
+    volatilities = np.array([base_volatility * REGIME_PARAMETERS[name][1] for name in REGIMES])
+    return drifts, volatilities
+
+
+class RegimeSwitching:
+    """Samples per-tick regime indices from a daily transition matrix."""
+
+    def __init__(self, initial_regime="Normal", tick_interval=1.0, transitions=None):
+        transitions = np.asarray(REGIME_TRANSITIONS if transitions is None else transitions, dtype=float)
+        if transitions.shape != (len(REGIMES), len(REGIMES)):
+            raise ValueError(f"Transition matrix must be {len(REGIMES)}x{len(REGIMES)}")
+        if not np.allclose(transitions.sum(axis=1), 1.0):
+            raise ValueError("Transition matrix rows must sum to 1")
+
+        self.initial_regime = REGIMES.index(initial_regime)
+        # Per-tick exit hazard of each regime, so holding times are geometric
+        stay = np.diag(transitions) ** (float(tick_interval) / SECONDS_PER_DAY)
+        self._exit_rate = -np.log(np.clip(stay, 1e-300, 1.0))
+        # Jump chain: where the process goes once it leaves a regime
+        jumps = transitions - np.diag(np.diag(transitions))
+        totals = jumps.sum(axis=1, keepdims=True)
+        self._jump_cdf = np.cumsum(np.divide(jumps, totals, out=np.zeros_like(jumps), where=totals > 0), axis=1)
+        self.reset()
+
+    def reset(self):
+        self._regime = self.initial_regime
+        self._remaining = None
+
+    def get_state(self):
+        return {"regime": self._regime, "remaining": self._remaining}
+
+    def set_state(self, state):
+        self._regime = state["regime"]
+        self._remaining = state["remaining"]
+
+    def _holding_time(self, regime, exponential):
+        rate = self._exit_rate[regime]
+        if rate == 0:
+            return np.inf
+        return max(int(np.ceil(exponential / rate)), 1)
+
+    def sample(self, rng, n):
+        """Return the regime index of each of the next ``n`` ticks."""
+        regime, remaining = self._regime, self._remaining
+        if remaining is None:
+            remaining = self._holding_time(regime, rng.standard_exponential())
+
+        segment_regimes, segment_lengths = [], []
+        filled = 0
+        draws = iter(())
+        while True:
+            take = int(min(remaining, n - filled))
+            segment_regimes.append(regime)
+            segment_lengths.append(take)
+            filled += take
+            remaining -= take
+            if filled == n:
+                break
+            # The regime ended inside this chunk; regime changes are drawn in blocks
+            draw = next(draws, None)
+            if draw is None:
+                draws = zip(rng.standard_exponential(_SEGMENT_BLOCK), rng.random(_SEGMENT_BLOCK))
+                draw = next(draws)
+            exponential, uniform = draw
+            regime = min(int(np.searchsorted(self._jump_cdf[regime], uniform, side="right")),
+                         len(REGIMES) - 1)
+            remaining = self._holding_time(regime, exponential)
+
+        self._regime, self._remaining = regime, remaining
+        return np.repeat(np.array(segment_regimes, dtype=np.int8), segment_lengths)
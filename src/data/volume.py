@@ -0,0 +1,159 @@
+"""
+Volume synthesis for the Volume Settings group.
+
+Volume per bar is the product of a base level, a seasonal curve, a growth
+trend, a profile factor tying volume to the price move, log-normal noise and
+sparse spikes. Seasonal curves are tabulated once per configuration and
+applied as contiguous slices, and spikes only touch the positions they hit,
+so each row costs a few vectorised operations.
+"""
+import functools
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+SECONDS_PER_YEAR = 365.0 * SECONDS_PER_DAY
+CURVE_BINS = 1440
+MAX_TICK_CURVE = 1 << 22  # Longest per-tick seasonal curve kept in memory
+
+# Mirrors the defaults of the Volume Settings group in Ui_MainWindow
+DEFAULT_VOLUME_SETTINGS = {
+    "base_volume": 100000,
+    "volatility": 40.0,         # Log-normal noise of volume per bar (%)
+    "trend": 0.0,               # Annualised volume growth (%)
+    "pattern": "Normal",
+    "profile": "Balanced",
+    "spike_probability": 0.05,  # Chance of a spike per bar
+    "spike_multiplier": 3.0
+}
+
+# Seasonal patterns: (period in days, offset in days, shape over the unit interval)
+_PATTERNS = {
+    "U-Shape (Day)": (1.0, 0.0, lambda x: 1.0 + 3.0 * (2.0 * x - 1.0) ** 2),
+    "Front Loaded": (1.0, 0.0, lambda x: np.exp(-3.0 * x)),
+    "Back Loaded": (1.0, 0.0, lambda x: np.exp(3.0 * (x - 1.0))),
+    # Weeks start on Monday; the Unix epoch fell on a Thursday
+    "W-Shape (Week)": (7.0, 3.0, lambda x: 1.0 + 0.6 * np.cos(4.0 * np.pi * x)),
+    "Monthly Cycle": (30.0, 0.0, lambda x: 1.0 + 0.3 * np.cos(2.0 * np.pi * x)),
+    "Earnings Season": (91.25, 0.0, lambda x: 1.0 + 2.0 * np.exp(-((x - 0.1) / 0.05) ** 2))
+}
+
+
+@functools.lru_cache(maxsize=None)
+def seasonal_curve(pattern, bins=CURVE_BINS):
+    """
+    Tabulate a volume pattern over one period, normalised to a mean of 1.
+
+    Returns ``(period_ms, offset_ms, table)``, or None for patterns without
+    seasonality ("Normal", "Custom", ...).
+    """
+    if pattern not in _PATTERNS:
+        return None
+    period_days, offset_days, shape = _PATTERNS[pattern]
+    table = shape((np.arange(bins) + 0.5) / bins)
+    table /= table.mean()
+    table.setflags(write=False)
+    return int(period_days * SECONDS_PER_DAY * 1000), int(offset_days * SECONDS_PER_DAY * 1000), table
+
+
+@functools.lru_cache(maxsize=16)
+def tick_curve(pattern, interval_ms, phase_ms):
+    """
+    The seasonal curve sampled at every tick of one period, starting at ``phase_ms``.
+
+    Returns None when the period is not a whole number of ticks or the
+    curve would be too long to cache, in which case callers look up the
+    binned table instead.
+    """
+    curve = seasonal_curve(pattern)
+    if curve is None or interval_ms <= 0:
+        return None
+    period_ms, _, table = curve
+    period_ticks, remainder = divmod(period_ms, interval_ms)
+    if remainder or period_ticks > MAX_TICK_CURVE:
+        return None
+    elapsed = (phase_ms + np.arange(period_ticks, dtype=np.int64) * interval_ms) % period_ms
+    values = table[elapsed * len(table) // period_ms]
+    values.setflags(write=False)
+    return values
+
+
+class VolumeModel:
+    """Generates bar volumes from Volume Settings parameters."""
+
+    def __init__(self, volume_settings=None, tick_interval=1.0):
+        self.volume_settings = {**DEFAULT_VOLUME_SETTINGS, **(volume_settings or {})}
+        settings = self.volume_settings
+        self.tick_interval = float(tick_interval)
+        self.pattern = settings["pattern"]
+        self.curve = seasonal_curve(self.pattern)
+        self._noise = settings["volatility"] / 100.0
+        self._growth = settings["trend"] / 100.0 * self.tick_interval / SECONDS_PER_YEAR
+        self._spike_rate = settings["spike_probability"]
+        self._spike_multiplier = settings["spike_multiplier"]
+        self.profile = settings["profile"]
+
+    def _profile_factor(self, rng, move, step_var):
+        """Volume multiplier tying volume to the standardised price move of each bar."""
+        if self.profile in ("Top Heavy", "Bottom Heavy"):
+            moves = move / np.sqrt(step_var)
+        if self.profile == "Top Heavy":
+            return 1.0 + 0.5 * np.tanh(moves)
+        if self.profile == "Bottom Heavy":
+            return 1.0 - 0.5 * np.tanh(moves)
+        if self.profile == "Multi-Modal":
+            # Quiet and active trading modes, 30% of bars in the active one
+            factor = np.where(rng.random(len(move)) < 0.3, 2.5, 1.0)
+            factor /= 0.3 * 2.5 + 0.7
+            return factor
+        if self.profile == "Random":
+            return np.exp(0.5 * rng.standard_normal(len(move)) - 0.125)
+        return None
+
+    def _apply_curve(self, ticks, timestamps, out):
+        period_ms, offset_ms, table = self.curve
+        interval_ms = int(round(self.tick_interval * 1000))
+        first_ms = int(timestamps[:1].view(np.int64)[0])
+        start_ms = first_ms - int(ticks[0]) * interval_ms
+        curve = tick_curve(self.pattern, interval_ms, (start_ms + offset_ms) % period_ms)
+        if curve is None:
+            elapsed = (timestamps.view(np.int64) + offset_ms) % period_ms
+            out *= table[elapsed * len(table) // period_ms]
+            return
+        # Walk the chunk period by period, multiplying contiguous slices
+        position = int(ticks[0]) % len(curve)
+        done = 0
+        while done < len(out):
+            take = min(len(curve) - position, len(out) - done)
+            out[done:done + take] *= curve[position:position + take]
+            done += take
+            position = 0
+
+    def sample(self, rng, ticks, timestamps, move, step_var, out):
+        """
+        Write the volumes of one chunk into ``out``.
+
+        ``ticks`` are the bar indices since the start of the path and
+        ``timestamps`` the bar times. ``move`` is the open-to-close log move of
+        each bar and ``step_var`` its diffusion variance.
+        """
+        n = len(out)
+        # Log-normal noise with unit mean, plus the growth trend
+        out[:] = rng.standard_normal(n)
+        out *= self._noise
+        out -= 0.5 * self._noise ** 2
+        if self._growth:
+            out += self._growth * ticks
+        np.exp(out, out=out)
+        out *= self.volume_settings["base_volume"]
+
+        if self.curve is not None:
+            self._apply_curve(ticks, timestamps, out)
+
+        factor = self._profile_factor(rng, move, step_var)
+        if factor is not None:
+            out *= factor
+
+        n_spikes = rng.binomial(n, self._spike_rate) if self._spike_multiplier != 1 else 0
+        if n_spikes:
+            out[rng.integers(0, n, n_spikes)] *= self._spike_multiplier
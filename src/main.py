@@ -1,10 +1,32 @@
 import sys
+import threading
+import time
+import traceback
 from pathlib import Path
-from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QFileDialog
-from PySide6.QtGui import QIcon, QPalette, QColor
-from PySide6.QtCore import Qt
+import numpy as np
+from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QFileDialog, QInputDialog, QDialog
+from PySide6.QtGui import QAction, QIcon, QPalette, QColor
+from PySide6.QtCore import Qt, QTimer
 from ui.generated_ui import Ui_MainWindow
 from ui.settings import Settings
+from ui.dialogs.load_data_dialog import LoadDataDialog
+from ui.dialogs.settings_dialog import SettingsDialog
+from ui.dialogs.sweep_dialog import SweepDialog
+from ui.dialogs.walk_forward_dialog import WalkForwardDialog
+from data.data_generator import DataGenerator, InfiniteDataRun, generate_paths
+from data.data_loader import LazyDataset, read_csv, save_dataset
+from data.dataset_cache import DatasetCache, dataset_key
+from data.data_processor import PERIODS, BarResampler, information_bars
+from trading.backtester import DEFAULT_FEE, DEFAULT_SLIPPAGE, backtest
+from trading.optimizer import results_frame, sweep
+from trading.strategy_base import IndicatorCache, load_strategy
+from trading.walk_forward import summary, walk_forward
+from utils.jobs import JobCancelled, JobRunner
+from visualization.plot_manager import PlotManager
+
+INFINITE_RUN_INTERVAL = 0.1  # Seconds between chunks of the infinite run
+VIEW_RELOAD_DELAY_MS = 250  # Quiet time after panning or zooming before more of a dataset is read
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -13,6 +35,32 @@ class MainWindow(QMainWindow):
         self.ui.setupUi(self)
         self.settings = Settings()
         self.app = QApplication.instance()
+        self.data = None
+        self.dataset = None
+        self.view_range = None
+        # The latest view reload requested while another was still running
+        self.pending_view = None
+        # First and last time of the open dataset
+        self.dataset_range = None
+        # Bars of every period for generated and streamed ticks
+        self.resampler = BarResampler()
+        # Dollar or volume bars of the current ticks, for the plot types that show them
+        self.information_bars = None
+        self.plot_manager = PlotManager(self.ui.plot_area)
+        # Generation, loading and saving run in the background, one job per resource
+        self.jobs = JobRunner(self.ui.statusbar, parent=self)
+        self.infinite_run = None
+        # Producer thread pushing infinite run chunks to the plot manager
+        self.infinite_thread = None
+        self.paths = None
+        self.backtest_result = None
+        # Indicators computed by strategies, kept across runs and code edits
+        self.indicator_cache = IndicatorCache(self.settings.get_cache_size() << 20)
+        # Generated datasets on disk, so regenerating the same settings is a memory-map
+        self.dataset_cache = DatasetCache(self.settings.settings_dir / "datasets",
+                                          self.settings.get_cache_size() << 20)
+        self.sweep_dialog = None
+        self.walk_forward_results = None
         
         # Apply spinbox styling
         self.setup_spinbox_styling()
@@ -23,6 +71,36 @@ class MainWindow(QMainWindow):
         # Connect data buttons
         self.ui.load_data_btn.clicked.connect(self.show_load_dialog)
         self.ui.save_data_btn.clicked.connect(self.show_save_dialog)
+        self.ui.generate_data_btn.clicked.connect(self.generate_data)
+        self.ui.run_strategy_btn.clicked.connect(self.run_strategy)
+        
+        # Reload the visible window of a loaded dataset when the view changes
+        self.ui.period_combo.currentIndexChanged.connect(self.refresh_view)
+        self.ui.plot_type_combo.currentIndexChanged.connect(self.refresh_view)
+        # Panning or zooming reads the newly visible part of the dataset once the view settles
+        self.view_timer = QTimer(self)
+        self.view_timer.setSingleShot(True)
+        self.view_timer.setInterval(VIEW_RELOAD_DELAY_MS)
+        self.view_timer.timeout.connect(self.follow_view)
+        self.plot_manager.price.getViewBox().sigXRangeChanged.connect(self.view_timer.start)
+        
+        # Connect infinite data run buttons
+        self.ui.start_btn.clicked.connect(self.start_infinite_run)
+        self.ui.pause_btn.clicked.connect(self.pause_infinite_run)
+        self.ui.stop_btn.clicked.connect(self.stop_infinite_run)
+        self.ui.reset_btn.clicked.connect(self.reset_infinite_run)
+        
+        # Monte Carlo scenario generation
+        self.action_monte_carlo = QAction("Monte Carlo Paths...", self)
+        self.action_monte_carlo.triggered.connect(self.generate_scenarios)
+        self.ui.menu_tools.addAction(self.action_monte_carlo)
+        self.action_sweep = QAction("Parameter Sweep...", self)
+        self.action_sweep.triggered.connect(self.show_sweep_dialog)
+        self.ui.menu_tools.addAction(self.action_sweep)
+        self.action_walk_forward = QAction("Walk-Forward Test...", self)
+        self.action_walk_forward.triggered.connect(self.run_walk_forward)
+        self.ui.menu_tools.addAction(self.action_walk_forward)
+        self.ui.action_settings.triggered.connect(self.show_settings_dialog)
         
         # Apply initial theme after UI setup
         self.apply_theme(self.settings.get_theme() == 'dark')
@@ -313,17 +391,540 @@ class MainWindow(QMainWindow):
             spinbox.setMaximumHeight(24)
             spinbox.setStyleSheet(spinbox_style)
 
-    def show_load_dialog(self):
-        """Opens a file dialog for loading data files"""
-        file_name, _ = QFileDialog.getOpenFileName(
-            self,
-            "Load Data File",
-            "",
-            "CSV Files (*.csv);;Excel Files (*.xlsx *.xls);;All Files (*.*)"
+    def get_price_settings(self):
+        """Collects the Price Settings panel into a generator settings dict"""
+        return {
+            "initial_price": self.ui.initial_price.value(),
+            "volatility": self.ui.volatility.value(),
+            "drift": self.ui.drift.value(),
+            "mean_reversion": self.ui.mean_reversion.value(),
+            "market_regime": self.ui.market_regime.currentText(),
+            "regime_switching": self.ui.regime_switching.isChecked(),
+            "distribution": self.ui.price_distribution.currentText(),
+            "gap_probability": self.ui.gap_probability.value(),
+            "gap_size": self.ui.gap_size.value()
+        }
+
+    def get_volume_settings(self):
+        """Collects the Volume Settings panel into a generator settings dict"""
+        return {
+            "base_volume": self.ui.base_volume.value(),
+            "volatility": self.ui.volume_volatility.value(),
+            "trend": self.ui.volume_trend.value(),
+            "pattern": self.ui.volume_pattern.currentText(),
+            "profile": self.ui.volume_profile.currentText(),
+            "spike_probability": self.ui.spike_probability.value(),
+            "spike_multiplier": self.ui.spike_multiplier.value()
+        }
+
+    def generate_data(self):
+        """
+        Generates a synthetic price series from the current settings in the
+        background, or maps it from the dataset cache when the same settings
+        were generated before.
+        """
+        n_points = int(self.ui.initial_amount.value())
+        generator = DataGenerator(
+            self.get_price_settings(),
+            seed=self.settings.get_seed(),
+            volume_settings=self.get_volume_settings()
         )
-        if file_name:
-            # TODO: Add code to load the selected file
-            print(f"Selected file: {file_name}")
+        key = dataset_key(generator, n_points)
+        kind = self.information_bar_kind()
+
+        def generate(job):
+            start = time.perf_counter()
+            data = self.dataset_cache.load(key)
+            cached = data is not None
+            if not cached:
+                data = generator.generate(n_points, progress=lambda done: job.progress(done, f"{done:.0%}"))
+                self.dataset_cache.store(key, data)
+            # Bars for every period are built off the GUI thread too, so switching periods redraws at once
+            resampler = BarResampler()
+            resampler.update(data)
+            bars = information_bars(data, kind) if kind and not data.is_empty() else None
+            return data, resampler, bars, time.perf_counter() - start, cached
+
+        self.jobs.submit("data", "Generating data", generate, on_finished=self.show_generated_data)
+
+    def show_generated_data(self, result):
+        data, resampler, bars, elapsed, cached = result
+        self.data = data
+        self.dataset = None
+        self.resampler = resampler
+        self.show_information_bars(bars, len(data))
+        self.update_plot()
+        if cached:
+            self.ui.statusbar.showMessage(f"Loaded {len(data):,} points from the dataset cache in {elapsed:.2f}s")
+            return
+        self.ui.statusbar.showMessage(
+            f"Generated {len(data):,} points in {elapsed:.2f}s "
+            f"({len(data) / max(elapsed, 1e-9):,.0f} points/s)"
+        )
+
+    def generate_scenarios(self):
+        """Generates independent Monte Carlo paths from the current price settings"""
+        n_paths, ok = QInputDialog.getInt(self, "Monte Carlo Paths", "Number of paths:", 100, 1, 100000)
+        if not ok:
+            return
+        n_points = int(self.ui.initial_amount.value())
+        kwargs = {
+            "price_settings": self.get_price_settings(),
+            "seed": self.settings.get_seed(),
+            "volume_settings": self.get_volume_settings()
+        }
+
+        def generate(job):
+            # Workers write into one shared memory block that becomes the result arrays
+            start = time.perf_counter()
+            paths = generate_paths(n_paths, n_points, progress=lambda done: job.progress(done, f"{done:.0%}"),
+                                   **kwargs)
+            return paths, time.perf_counter() - start
+
+        def done(result):
+            self.paths, elapsed = result
+            self.ui.statusbar.showMessage(
+                f"Generated {n_paths:,} paths of {n_points:,} points in {elapsed:.2f}s"
+            )
+
+        self.jobs.submit("scenarios", "Generating Monte Carlo paths", generate, on_finished=done)
+
+    def start_infinite_run(self):
+        """Starts or resumes the infinite data run"""
+        # A second producer would interleave its chunks with the live one's
+        if self.infinite_thread is not None and self.infinite_thread.is_alive():
+            return
+        new_run = self.infinite_run is None
+        if new_run:
+            generator = DataGenerator(
+                self.get_price_settings(),
+                seed=self.settings.get_seed(),
+                volume_settings=self.get_volume_settings()
+            )
+            self.infinite_run = InfiniteDataRun(
+                generator,
+                initial_points=int(self.ui.infinite_initial_amount.value())
+            )
+            self.dataset = None
+            self.plot_manager.clear_stream()
+        # Ticks are generated on a producer thread and drawn at the plot manager's frame rate
+        self.plot_manager.start_stream(int(self.ui.initial_amount.value()), self.draw_stream_frame)
+        if new_run:
+            # Only the bars the plot can show are kept, so the run's memory stays bounded
+            self.resampler = BarResampler(max_bars=self.plot_manager.capacity)
+        self.infinite_run.start()
+        self.infinite_thread = threading.Thread(
+            target=self.infinite_run.run, args=(self.plot_manager.push, INFINITE_RUN_INTERVAL), daemon=True
+        )
+        self.infinite_thread.start()
+
+    def join_infinite_run(self):
+        """Waits for the producer thread, which exits as soon as the run is halted"""
+        if self.infinite_thread is not None:
+            self.infinite_thread.join()
+            self.infinite_thread = None
+        self.plot_manager.stop_stream()
+
+    def pause_infinite_run(self):
+        # Pause and Stop also cancel background jobs, which cannot be resumed
+        self.jobs.cancel()
+        if self.infinite_run is not None:
+            self.infinite_run.pause()
+            self.join_infinite_run()
+            self.ui.statusbar.showMessage(f"Infinite run paused at tick {self.infinite_run.tick:,}")
+
+    def stop_infinite_run(self):
+        self.jobs.cancel()
+        if self.infinite_run is not None:
+            self.infinite_run.stop()
+            self.join_infinite_run()
+            # The next start replays the clock from the beginning with a new seed
+            self.resampler.reset()
+            self.plot_manager.clear_stream()
+            self.ui.statusbar.showMessage("Infinite run stopped")
+
+    def reset_infinite_run(self):
+        """Stops the run and discards it so the next start picks up the current settings"""
+        if self.infinite_run is not None:
+            self.infinite_run.reset()
+            self.join_infinite_run()
+            self.resampler.reset()
+            self.plot_manager.clear_stream()
+            self.infinite_run = None
+            self.ui.statusbar.showMessage("Infinite run reset")
+
+    def draw_stream_frame(self, chunks):
+        """Folds the chunks that arrived since the last frame into the bars and redraws once"""
+        for chunk in chunks:
+            self.resampler.update(chunk)
+        self.update_plot(stream=True)
+        self.ui.statusbar.showMessage(f"Infinite run: {self.resampler.ticks:,} ticks")
+
+    def show_load_dialog(self):
+        """Opens the Load Data dialog for picking a file and its import options"""
+        dialog = LoadDataDialog(self.settings, self)
+        if dialog.exec() == QDialog.Accepted:
+            if dialog.is_csv():
+                self.load_data(dialog.path(), dialog.csv_options(), dialog.time_column())
+            else:
+                self.load_data(dialog.path())
+
+    def load_data(self, file_name, csv_options=None, time_column="timestamp"):
+        """
+        Opens a dataset lazily in the background and loads the most recent
+        window of it; the rest of the file is only read when the view moves
+        there. CSV files are read in full once, with the import options'
+        schema when there are any.
+        """
+        def open_dataset(job):
+            job.progress(0.0, f"opening {Path(file_name).name}")
+            frame = read_csv(file_name, **csv_options) if csv_options else None
+            job.check()
+            dataset = LazyDataset(file_name, time_column=time_column, frame=frame)
+            return dataset, dataset.time_range()
+
+        def failed(error):
+            QMessageBox.warning(self, "Load Data", f"Could not open {Path(file_name).name}: {error}")
+
+        self.jobs.submit("data", "Loading data", open_dataset, on_finished=self.show_dataset, on_failed=failed)
+
+    def show_dataset(self, result):
+        dataset, (first, last) = result
+        if first is None:
+            QMessageBox.warning(self, "Load Data", f"{dataset.path.name} contains no data")
+            return
+        self.dataset = dataset
+        self.dataset_range = (first, last)
+        # Show the last Data Points bars of the selected period
+        period_ms = PERIODS[self.ui.period_combo.currentText()]
+        spacing = np.timedelta64(period_ms, "ms") if period_ms else (last - first) / max(len(dataset) - 1, 1)
+        self.view_range = (max(first, last - spacing * (int(self.ui.initial_amount.value()) - 1)), None)
+        self.refresh_view()
+
+    def information_bar_kind(self):
+        """The information_bars kind of the selected plot type, None for time bars"""
+        return {"Dollar bar": "dollar", "Volume bar": "volume"}.get(self.ui.plot_type_combo.currentText())
+
+    def show_information_bars(self, bars, n_ticks):
+        """Keeps information bars built in the background, None for time bars"""
+        self.information_bars = bars
+        if bars is not None:
+            self.ui.statusbar.showMessage(
+                f"{len(bars):,} {self.ui.plot_type_combo.currentText().lower()}s from {n_ticks:,} ticks"
+            )
+
+    def plot_columns(self):
+        """Columns the selected plot type needs, None for all of them"""
+        if self.ui.plot_type_combo.currentText() in ("Line", "Area", "Scatter"):
+            return ["close"]
+        return None
+
+    def current_bars(self):
+        """Bars of generated or streamed ticks at the selected period, None for ticks"""
+        period_ms = PERIODS[self.ui.period_combo.currentText()]
+        if period_ms is None or not self.resampler.ticks:
+            return None
+        return self.resampler.bars(period_ms)
+
+    def refresh_view(self):
+        """
+        Loads the visible time range of the open dataset at the selected
+        period in the background; bars of generated data are already
+        maintained, and only information bars are built from their ticks
+        """
+        if self.dataset is not None:
+            self.load_view()
+            return
+        data, kind, time_column = self.data, self.information_bar_kind(), self.time_column()
+
+        def build(job):
+            if kind is None or data is None or data.is_empty():
+                return None
+            job.progress(0.0, "building bars")
+            return information_bars(data, kind, time_column=time_column)
+
+        def done(bars):
+            if self.dataset is not None or self.data is not data:
+                return
+            self.show_information_bars(bars, len(data) if data is not None else 0)
+            time_bars = self.current_bars()
+            if time_bars is not None and bars is None:
+                self.ui.statusbar.showMessage(
+                    f"{len(time_bars[0]):,} bars ({self.ui.period_combo.currentText()}) "
+                    f"from {self.resampler.ticks:,} ticks"
+                )
+            self.update_plot()
+
+        self.submit_view("Building bars", build, done)
+
+    def load_view(self, auto_range=True):
+        """
+        Loads ``view_range`` of the open dataset in the background and draws
+        it, auto-ranged or in the current view
+        """
+        dataset, (start, end) = self.dataset, self.view_range
+        kind, columns = self.information_bar_kind(), self.plot_columns()
+        # Information bars are built from the ticks rather than from time bars
+        period_ms = None if kind else PERIODS[self.ui.period_combo.currentText()]
+        period = self.ui.period_combo.currentText()
+
+        def load(job):
+            started = time.perf_counter()
+            job.progress(0.0, f"reading {dataset.path.name}")
+            data = dataset.load(columns, start, end, period_ms)
+            elapsed = time.perf_counter() - started
+            job.check()
+            bars = None
+            if kind and not data.is_empty():
+                bars = information_bars(data, kind, time_column=dataset.time_column)
+            return data, bars, elapsed
+
+        def done(result):
+            if self.dataset is not dataset:
+                return
+            self.data, bars, elapsed = result
+            self.ui.statusbar.showMessage(
+                f"{dataset.path.name}: loaded {len(self.data):,} rows ({period}) in {elapsed * 1000:.0f} ms"
+            )
+            self.show_information_bars(bars, len(self.data))
+            self.update_plot(auto_range=auto_range)
+
+        self.submit_view("Loading view", load, done)
+
+    def submit_view(self, label, function, on_finished):
+        """
+        Runs a job that reloads the view. A job still running is cancelled
+        and this one starts when it has returned, so the latest settings win.
+        """
+        self.pending_view = (label, function, on_finished)
+        if self.jobs.is_busy("view"):
+            self.jobs.cancel("view")
+            return
+        self.start_pending_view()
+
+    def start_pending_view(self):
+        if self.pending_view is None:
+            return
+        label, function, on_finished = self.pending_view
+        self.pending_view = None
+
+        def failed(error):
+            self.ui.statusbar.showMessage(f"{label} failed: {error}")
+            self.start_pending_view()
+
+        self.jobs.submit("view", label, function, on_finished=on_finished, on_failed=failed,
+                         on_cancelled=self.start_pending_view)
+
+    def follow_view(self):
+        """
+        Loads the part of the open dataset the view has moved to, with one
+        view width to either side so small pans need no further reads
+        """
+        if self.dataset is None or self.view_range is None:
+            return
+        (x0, x1), _ = self.plot_manager.price.viewRange()
+        first, last = self.dataset_range
+        start, end = self.view_range
+        visible_start = max(first, np.datetime64(int(x0 * 1000), "ms"))
+        visible_end = np.datetime64(int(x1 * 1000), "ms")
+        if visible_start >= start and (end is None or visible_end < end):
+            return
+        width = visible_end - visible_start
+        start = max(first, visible_start - width)
+        end = visible_end + width
+        self.view_range = (start, None if end > last else end)
+        self.load_view(auto_range=False)
+
+    def plot_style(self):
+        """How prices are drawn for the selected plot type"""
+        plot_type = self.ui.plot_type_combo.currentText()
+        if plot_type in ("Line", "Area", "Scatter"):
+            return "line"
+        return "ohlc" if plot_type == "OHLC" else "candlestick"
+
+    def update_plot(self, stream=False, auto_range=True):
+        """
+        Draws the information bars, time bars or ticks currently selected;
+        ``stream`` marks a frame of the infinite run, drawn in place, and
+        without ``auto_range`` a loaded dataset is drawn in the current view.
+        """
+        style = self.plot_style()
+        if self.information_bars is not None:
+            self.plot_manager.set_frame(self.information_bars, self.time_column(), style=style, auto_range=auto_range)
+            return
+        bars = self.current_bars() if self.dataset is None else None
+        if self.infinite_run is not None and self.plot_manager.buffers:
+            # Streamed runs show the latest window: Data Points bars, or the buffered ticks
+            if bars is None:
+                self.plot_manager.set_data(*self.plot_manager.stream_data(), style=style, stream=stream)
+            else:
+                window = self.plot_manager.capacity
+                times, columns = bars
+                self.plot_manager.set_data(times[-window:], {name: values[-window:] for name, values in columns.items()},
+                                           style=style, stream=stream)
+        elif bars is not None:
+            self.plot_manager.set_data(*bars, style=style)
+        elif self.data is not None:
+            self.plot_manager.set_frame(self.data, self.time_column(), style=style, auto_range=auto_range)
+        else:
+            self.plot_manager.clear()
+
+    def strategy_data(self):
+        """The series on the chart as a frame, which strategies run on"""
+        if self.information_bars is not None:
+            return self.information_bars
+        period_ms = PERIODS[self.ui.period_combo.currentText()]
+        if self.dataset is None and period_ms is not None and self.resampler.ticks:
+            return self.resampler.frame(period_ms)
+        return self.data
+
+    def time_column(self):
+        """Time column of the loaded dataset, which information bars keep too"""
+        return self.dataset.time_column if self.dataset is not None else "timestamp"
+
+    def show_settings_dialog(self):
+        dialog = SettingsDialog(self.settings, self)
+        if dialog.exec() == QDialog.Accepted:
+            self.indicator_cache.resize(self.settings.get_cache_size() << 20)
+            self.dataset_cache.resize(self.settings.get_cache_size() << 20)
+            self.ui.theme_selector.setCurrentIndex(dialog.theme_index())
+
+    def run_strategy(self):
+        """
+        Runs the strategy in the code editor on the charted series in the
+        background and shows its backtest statistics in the Stats tab.
+
+        The code either defines a ``StrategyBase`` subclass, whose indicators
+        come from the session's indicator cache, or a function
+        ``positions(data)`` returning one target position per bar of the
+        Polars frame ``data``, in which case it may set ``FEE`` and ``SLIPPAGE``.
+        """
+        data = self.strategy_data()
+        if data is None or data.is_empty():
+            self.ui.statusbar.showMessage("Generate or load data before running a strategy")
+            return
+        code = self.ui.code_editor.toPlainText()
+        time_column = self.time_column()
+
+        def run(job):
+            strategy, namespace = load_strategy(code)
+            if strategy is not None:
+                job.progress(0.0, "computing indicators")
+                return strategy().run(data, self.indicator_cache, time_column)
+            if not callable(namespace.get("positions")):
+                raise ValueError("The strategy must define a StrategyBase subclass or positions(data), "
+                                 "returning one position per bar")
+            job.progress(0.0, "computing positions")
+            positions = namespace["positions"](data)
+            job.progress(0.5, f"backtesting {len(data):,} bars")
+            return backtest(
+                data.get_column("close").to_numpy(), positions,
+                fee=namespace.get("FEE", DEFAULT_FEE), slippage=namespace.get("SLIPPAGE", DEFAULT_SLIPPAGE),
+                times=data.get_column(time_column).to_numpy()
+            )
+
+        self.jobs.submit("strategy", "Running strategy", run,
+                         on_finished=self.show_backtest, on_failed=self.show_strategy_error)
+
+    def show_backtest(self, result):
+        self.backtest_result = result
+        self.ui.stats_results.setPlainText(result.summary())
+        self.ui.editor_tab_widget.setCurrentWidget(self.ui.stats_tab)
+        self.ui.statusbar.showMessage(f"Backtested {len(result):,} bars")
+
+    def show_strategy_error(self, error):
+        """Shows the strategy's traceback in the Console tab"""
+        self.ui.console_output.appendPlainText("".join(traceback.format_exception(error)))
+        self.ui.editor_tab_widget.setCurrentWidget(self.ui.console_tab)
+        self.ui.statusbar.showMessage(f"Strategy failed: {error}")
+
+    def show_sweep_dialog(self):
+        if self.sweep_dialog is None:
+            self.sweep_dialog = SweepDialog(self)
+            self.sweep_dialog.run_btn.clicked.connect(self.run_sweep)
+            self.sweep_dialog.stop_btn.clicked.connect(lambda: self.jobs.cancel("sweep"))
+        self.sweep_dialog.show()
+        self.sweep_dialog.raise_()
+
+    def run_sweep(self):
+        """
+        Sweeps the parameters of the editor's strategy on the charted series
+        across a process pool, adding results to the sweep table as batches
+        complete.
+        """
+        data = self.strategy_data()
+        if data is None or data.is_empty():
+            self.ui.statusbar.showMessage("Generate or load data before running a sweep")
+            return
+        dialog = self.sweep_dialog
+        try:
+            param_sets = dialog.parameter_sets(self.settings.get_seed())
+        except Exception as e:
+            QMessageBox.warning(dialog, "Parameter Sweep", f"Invalid parameter ranges: {e}")
+            return
+        code = self.ui.code_editor.toPlainText()
+        time_column = self.time_column()
+        dialog.model.set_frame(None)
+        dialog.count_label.setText(f"{len(param_sets):,} combinations")
+        cache_mb = self.settings.get_cache_size()
+
+        def run(job):
+            strategy, _ = load_strategy(code)
+            if strategy is None:
+                raise ValueError("Parameter sweeps need a StrategyBase subclass in the editor")
+            start = time.perf_counter()
+            results = sweep(code, param_sets, data, time_column,
+                            on_results=lambda rows: job.publish(results_frame(rows)),
+                            progress=lambda done: job.progress(done, f"{done:.0%} of {len(param_sets):,}"),
+                            cache_mb=cache_mb)
+            return results, time.perf_counter() - start
+
+        def done(result):
+            results, elapsed = result
+            self.ui.statusbar.showMessage(f"Swept {len(results):,} combinations in {elapsed:.2f}s")
+
+        self.jobs.submit("sweep", "Parameter sweep", run, on_partial=dialog.model.append,
+                         on_finished=done, on_failed=self.show_strategy_error)
+
+    def run_walk_forward(self):
+        """
+        Walk-forward tests the editor's strategy on Monte Carlo paths and shows
+        the distribution of its test statistics in the Stats tab.
+        """
+        dialog = WalkForwardDialog(int(self.ui.initial_amount.value()), self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        code = self.ui.code_editor.toPlainText()
+        preset = dialog.preset()
+        n_paths, n_points = dialog.paths_spin.value(), dialog.points_spin.value()
+        train, test = dialog.train_spin.value(), dialog.test_spin.value()
+        param_sets = dialog.parameter_sets()
+        kwargs = {
+            "price_settings": None if preset else self.get_price_settings(),
+            "preset": preset,
+            "seed": self.settings.get_seed(),
+            "volume_settings": self.get_volume_settings()
+        }
+        cache_mb = self.settings.get_cache_size()
+
+        def run(job):
+            strategy, _ = load_strategy(code)
+            if strategy is None:
+                raise ValueError("Walk-forward tests need a StrategyBase subclass in the editor")
+            # Path generation is the first fifth of the progress bar
+            paths = generate_paths(n_paths, n_points, progress=lambda done: job.progress(0.2 * done, "generating paths"),
+                                   **kwargs)
+            return walk_forward(code, paths, train, test, param_sets=param_sets, cache_mb=cache_mb,
+                                progress=lambda done: job.progress(0.2 + 0.8 * done, f"{done:.0%} of windows"))
+
+        def done(results):
+            self.walk_forward_results = results
+            self.ui.stats_results.setPlainText(summary(results))
+            self.ui.editor_tab_widget.setCurrentWidget(self.ui.stats_tab)
+            self.ui.statusbar.showMessage(f"Walk-forward tested {len(results):,} windows")
+
+        self.jobs.submit("strategy", "Walk-forward test", run, on_finished=done,
+                         on_failed=self.show_strategy_error)
 
     def show_save_dialog(self):
         """Opens a file dialog for saving data files"""
@@ -331,11 +932,53 @@ class MainWindow(QMainWindow):
             self,
             "Save Data File",
             "",
-            "CSV Files (*.csv);;Excel Files (*.xlsx);;All Files (*.*)"
+            "Parquet Files (*.parquet);;Arrow IPC Files (*.arrow);;CSV Files (*.csv);;All Files (*.*)"
         )
         if file_name:
-            # TODO: Add code to save data to the selected file
-            print(f"Saving to file: {file_name}")
+            self.save_data(file_name)
+
+    def save_data(self, file_name):
+        """
+        Saves the current dataset in the background, or streams a freshly
+        generated one to disk chunk by chunk when nothing has been generated yet
+        """
+        data = self.data
+        n_points = int(self.ui.initial_amount.value())
+        generator = None if data is not None else DataGenerator(
+            self.get_price_settings(),
+            seed=self.settings.get_seed(),
+            volume_settings=self.get_volume_settings()
+        )
+
+        def chunks(job):
+            written = 0
+            for chunk in generator.chunks(n_points):
+                yield chunk
+                written += len(chunk["close"])
+                job.progress(written / n_points, f"{written:,} of {n_points:,} rows")
+
+        def save(job):
+            start = time.perf_counter()
+            try:
+                rows = save_dataset(data if data is not None else chunks(job), file_name)
+            except JobCancelled:
+                # Do not leave a truncated file behind
+                Path(file_name).unlink(missing_ok=True)
+                raise
+            return rows, time.perf_counter() - start
+
+        def done(result):
+            rows, elapsed = result
+            size_mb = Path(file_name).stat().st_size / 1e6
+            self.ui.statusbar.showMessage(
+                f"Saved {rows:,} rows to {Path(file_name).name} "
+                f"({size_mb:,.1f} MB, {size_mb / max(elapsed, 1e-9):,.0f} MB/s)"
+            )
+
+        def failed(error):
+            QMessageBox.warning(self, "Save Data", f"Could not save {Path(file_name).name}: {error}")
+
+        self.jobs.submit("save", "Saving data", save, on_finished=done, on_failed=failed)
 
     def closeEvent(self, event):
         """
@@ -350,6 +993,11 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
+            self.jobs.cancel()
+            if self.infinite_run is not None:
+                self.infinite_run.pause()
+                self.join_infinite_run()
+            self.jobs.wait()
             event.accept()
         else:
             event.ignore()
@@ -1 +1,350 @@
+"""
+Backtesting of trading strategies on whole arrays.
 
+A strategy hands over one target position per bar, as a fraction of equity
+(1 fully long, -1 fully short, 0 flat). A position decided on the close of
+bar ``i`` is filled at that close and earns the return of bar ``i + 1``, so
+no bar ever trades on its own future. Fills, fees, slippage, returns, the
+equity curve and drawdowns are all computed as NumPy array operations, with
+no Python loop over bars.
+
+Path-dependent rules (stops, trailing exits, sizing from current equity)
+go through ``event_backtest`` instead, whose per-bar loop is compiled with
+numba; ``event_backtest_reference`` interprets the same loop, and is kept
+as the specification the compiled version is checked against.
+"""
+import functools
+import math
+
+import numpy as np
+
+from data.data_generator import SECONDS_PER_YEAR
+
+DEFAULT_FEE = 0.001        # Taker fee per unit of traded notional
+DEFAULT_SLIPPAGE = 0.0005  # Price impact per fill, as a fraction of the price
+
+
+def positions_from_signals(signals):
+    """
+    Positions held after each bar from a sparse signal array.
+
+    Any number is a new target position; NaN keeps the previous one. The
+    position before the first signal is flat.
+    """
+    signals = np.asarray(signals, dtype=np.float64)
+    has_signal = ~np.isnan(signals)
+    # Index of the latest signal at or before each bar, -1 before the first one
+    latest = np.maximum.accumulate(np.where(has_signal, np.arange(len(signals)), -1))
+    return np.where(latest >= 0, signals[np.maximum(latest, 0)], 0.0)
+
+
+def bars_per_year(times):
+    """Bars per year from bar times (datetime64 or epoch ms), using the median spacing."""
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype("datetime64[ms]").view(np.int64)
+    if len(times) < 2:
+        return None
+    spacing_ms = float(np.median(np.diff(times[:100_001])))
+    return SECONDS_PER_YEAR * 1000.0 / spacing_ms if spacing_ms > 0 else None
+
+
+class BacktestResult:
+    """
+    Per-bar arrays of a backtest and the statistics derived from them.
+
+    ``positions`` are the positions held over each bar, ``trades`` the
+    change of position filled at each bar's close, and ``returns`` the net
+    return of each bar after fees and slippage.
+    """
+
+    def __init__(self, close, positions, trades, costs, returns, equity, periods_per_year=None,
+                 initial_capital=1.0, turnover=None):
+        self.close = close
+        self.positions = positions
+        self.trades = trades
+        self.costs = costs
+        self.returns = returns
+        self.equity = equity
+        self.periods_per_year = periods_per_year
+        self.initial_capital = initial_capital
+        self._turnover = turnover
+        self._drawdown = None
+        self._stats = None
+
+    def __len__(self):
+        return len(self.returns)
+
+    @property
+    def drawdown(self):
+        """Fractional distance of the equity below its running peak (0 or negative)."""
+        if self._drawdown is None:
+            self._drawdown = self.equity / np.maximum.accumulate(self.equity) - 1.0
+        return self._drawdown
+
+    @property
+    def turnover(self):
+        return np.abs(self.trades) if self._turnover is None else self._turnover
+
+    def fills(self, slippage=0.0):
+        """Bar indices, sizes and prices of every fill, slippage included."""
+        index = np.flatnonzero(self.trades)
+        size = self.trades[index]
+        return index, size, self.close[index] * (1.0 + slippage * np.sign(size))
+
+    def stats(self):
+        """Summary statistics; annualised figures need ``periods_per_year``."""
+        if self._stats is not None:
+            return self._stats
+        returns = self.returns
+        n = len(returns)
+        final = self.equity[-1] / self.initial_capital if n else 1.0
+        mean = returns.mean() if n else 0.0
+        std = returns.std() if n else 0.0
+        stats = {
+            "bars": n,
+            "total_return": float(final - 1.0),
+            "max_drawdown": float(self.drawdown.min()) if n else 0.0,
+            "trades": int(np.count_nonzero(self.trades)),
+            "turnover": float(self.turnover.sum()),
+            "costs": float(self.costs.sum()),
+            "exposure": float(np.count_nonzero(self.positions)) / n if n else 0.0,
+            "annual_return": None,
+            "annual_volatility": None,
+            "sharpe": None
+        }
+        if self.periods_per_year and n:
+            years = n / self.periods_per_year
+            stats["annual_return"] = float(final ** (1.0 / years) - 1.0) if final > 0 else -1.0
+            stats["annual_volatility"] = float(std * np.sqrt(self.periods_per_year))
+            stats["sharpe"] = float(mean / std * np.sqrt(self.periods_per_year)) if std > 0 else None
+        self._stats = stats
+        return stats
+
+    def summary(self):
+        """The statistics as text for the Stats tab."""
+        stats = self.stats()
+
+        def percent(value):
+            return "n/a" if value is None else f"{value:.2%}"
+
+        sharpe = "n/a" if stats["sharpe"] is None else f"{stats['sharpe']:.2f}"
+        return "\n".join([
+            f"Bars:               {stats['bars']:,}",
+            f"Total return:       {percent(stats['total_return'])}",
+            f"Annual return:      {percent(stats['annual_return'])}",
+            f"Annual volatility:  {percent(stats['annual_volatility'])}",
+            f"Sharpe ratio:       {sharpe}",
+            f"Max drawdown:       {percent(stats['max_drawdown'])}",
+            f"Trades:             {stats['trades']:,}",
+            f"Turnover:           {stats['turnover']:,.2f}",
+            f"Fees and slippage:  {percent(stats['costs'])}",
+            f"Exposure:           {percent(stats['exposure'])}"
+        ])
+
+
+def backtest(close, positions, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE, times=None, periods_per_year=None,
+             initial_capital=1.0):
+    """
+    Backtest target ``positions`` (one per bar, as a fraction of equity) on ``close``.
+
+    ``fee`` is charged on the traded notional and ``slippage`` moves every
+    fill against the trade, both as fractions of the price, so each bar
+    costs ``|change of position| * (fee + slippage)`` of equity. Bars per
+    year for the annualised statistics come from ``periods_per_year`` or
+    the spacing of ``times``.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    target = np.asarray(positions, dtype=np.float64)
+    if target.shape != close.shape:
+        raise ValueError(f"Expected {len(close):,} positions, got {len(target):,}")
+    n = len(close)
+
+    # Positions held over each bar are the targets set on the previous close
+    held = np.empty(n)
+    held[:1] = 0.0
+    held[1:] = target[:-1]
+    trades = np.diff(target, prepend=0.0)
+    costs = np.abs(trades)
+    costs *= fee + slippage
+
+    returns = np.empty(n)
+    returns[:1] = 0.0
+    np.divide(close[1:], close[:-1], out=returns[1:])
+    returns[1:] -= 1.0
+    returns *= held
+    returns -= costs
+
+    equity = np.add(returns, 1.0)
+    np.cumprod(equity, out=equity)
+    equity *= initial_capital
+    if periods_per_year is None and times is not None:
+        periods_per_year = bars_per_year(times)
+    return BacktestResult(close, held, trades, costs, returns, equity, periods_per_year, initial_capital)
+
+
+# Event-driven backtests, for rules that depend on the path taken so far
+
+def _event_inputs(close, signals, high, low, open, stop_loss, take_profit, trailing_stop):
+    close = np.asarray(close, dtype=np.float64)
+    signals = np.asarray(signals, dtype=np.float64)
+    if signals.shape != close.shape:
+        raise ValueError(f"Expected {len(close):,} signals, got {len(signals):,}")
+    high = close if high is None else np.asarray(high, dtype=np.float64)
+    low = close if low is None else np.asarray(low, dtype=np.float64)
+    if open is None:
+        # Without opens, each bar opens where the previous one closed
+        open = np.concatenate((close[:1], close[:-1]))
+    else:
+        open = np.asarray(open, dtype=np.float64)
+    # A disabled rule is an infinitely distant level, which no price ever reaches
+    rules = tuple(math.inf if rule is None else float(rule) for rule in (stop_loss, take_profit, trailing_stop))
+    return close, signals, high, low, open, rules
+
+
+def _event_result(close, equity, exposure, turnover, costs, initial_capital, times, periods_per_year):
+    """A BacktestResult from the per-bar outputs of an event-driven run."""
+    previous = np.empty(len(equity))
+    previous[:1] = initial_capital
+    previous[1:] = equity[:-1]
+    returns = equity / previous - 1.0
+    # Turnover and costs as fractions of the equity the bar started with
+    turnover = turnover / previous
+    costs = costs / previous
+    trades = np.diff(exposure, prepend=0.0)
+    trades[turnover == 0.0] = 0.0
+    if periods_per_year is None and times is not None:
+        periods_per_year = bars_per_year(times)
+    return BacktestResult(close, exposure, trades, costs, returns, equity, periods_per_year,
+                          initial_capital, turnover)
+
+
+def _event_loop(close, high, low, open, signals, sl, tp, tr, fraction, fee, slippage, cash,
+                equity, exposure, turnover, costs):
+    """
+    The per-bar loop of an event-driven backtest, filling the four output arrays.
+
+    Plain Python on scalars and arrays, so ``event_backtest_reference`` runs
+    it as written and ``event_backtest`` runs the same source compiled.
+    """
+    units, entry, extreme = 0.0, 0.0, 0.0
+    for i in range(len(close)):
+        c, h, l, o, s = close[i], high[i], low[i], open[i], signals[i]
+        traded, cost = 0.0, 0.0
+
+        # Stops and targets, checked against the bar's range before any new signal
+        if units != 0.0:
+            side = 1.0 if units > 0.0 else -1.0
+            level = side * max(side * (entry * (1.0 - side * sl)), side * (extreme * (1.0 - side * tr)))
+            target = entry * (1.0 + side * tp)
+            adverse = l if side > 0.0 else h
+            favorable = h if side > 0.0 else l
+            hit_stop = side * adverse <= side * level
+            if hit_stop or side * favorable >= side * target:
+                # A bar that opens beyond the level fills at the open: min(open, stop) for a long stop
+                if hit_stop:
+                    price = side * min(side * level, side * o)
+                else:
+                    price = side * max(side * target, side * o)
+                value = units * (price * (1.0 - side * slippage))
+                fee_paid = fee * abs(value)
+                cash = cash + value - fee_paid
+                traded = abs(value)
+                cost = fee_paid + abs(units) * price * slippage
+                units = 0.0
+            else:
+                extreme = max(extreme, h) if side > 0.0 else min(extreme, l)
+
+        # A signal to a different side closes the position and opens the new one at the close
+        if not math.isnan(s):
+            new_side = 1.0 if s > 0.0 else (-1.0 if s < 0.0 else 0.0)
+            side = 1.0 if units > 0.0 else (-1.0 if units < 0.0 else 0.0)
+            if new_side != side:
+                if units != 0.0:
+                    value = units * (c * (1.0 - side * slippage))
+                    fee_paid = fee * abs(value)
+                    cash = cash + value - fee_paid
+                    traded = traded + abs(value)
+                    cost = cost + (fee_paid + abs(units) * c * slippage)
+                    units = 0.0
+                if new_side != 0.0:
+                    fill = c * (1.0 + new_side * slippage)
+                    notional = fraction * abs(s) * max(cash, 0.0)
+                    units = new_side * notional / fill
+                    fee_paid = fee * notional
+                    cash = cash - units * fill - fee_paid
+                    traded = traded + notional
+                    cost = cost + (fee_paid + abs(units) * c * slippage)
+                    entry, extreme = fill, c
+
+        value = cash + units * c
+        equity[i] = value
+        exposure[i] = units * c / value if value != 0.0 else 0.0
+        turnover[i] = traded
+        costs[i] = cost
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_event_loop():
+    """``_event_loop`` compiled by numba; numba is only imported when it is used."""
+    import numba
+
+    # IEEE semantics throughout (no fast-math), so results match the interpreted loop bit for bit
+    return numba.njit(cache=True, error_model="numpy")(_event_loop)
+
+
+def _run_event_loop(compiled, close, signals, high, low, open, stop_loss, take_profit, trailing_stop, fraction,
+                    fee, slippage, initial_capital, times, periods_per_year):
+    close, signals, high, low, open, (sl, tp, tr) = _event_inputs(close, signals, high, low, open,
+                                                                   stop_loss, take_profit, trailing_stop)
+    n = len(close)
+    equity, exposure = np.empty(n), np.empty(n)
+    turnover, costs = np.empty(n), np.empty(n)
+    inputs = (close, high, low, open, signals)
+    if compiled:
+        loop = _compiled_event_loop()
+    else:
+        # The interpreter is faster on Python floats than on NumPy scalars, with the same arithmetic
+        loop, inputs = _event_loop, tuple(values.tolist() for values in inputs)
+    loop(*inputs, sl, tp, tr, float(fraction), float(fee), float(slippage), float(initial_capital),
+         equity, exposure, turnover, costs)
+    return _event_result(close, equity, exposure, turnover, costs, initial_capital, times, periods_per_year)
+
+
+def event_backtest_reference(close, signals, high=None, low=None, open=None, stop_loss=None, take_profit=None,
+                             trailing_stop=None, fraction=1.0, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE,
+                             initial_capital=1.0, times=None, periods_per_year=None):
+    """
+    Event-driven backtest with the loop over bars interpreted; see ``event_backtest``.
+
+    Slow, but it is the specification the compiled version is checked against.
+    """
+    return _run_event_loop(False, close, signals, high, low, open, stop_loss, take_profit, trailing_stop,
+                           fraction, fee, slippage, initial_capital, times, periods_per_year)
+
+
+def event_backtest(close, signals, high=None, low=None, open=None, stop_loss=None, take_profit=None,
+                   trailing_stop=None, fraction=1.0, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE,
+                   initial_capital=1.0, times=None, periods_per_year=None):
+    """
+    Backtest entry and exit ``signals`` with path-dependent exits and sizing.
+
+    ``signals`` holds one value per bar: NaN for no signal, otherwise the
+    side to hold (its sign) and a size multiplier (its magnitude). A signal
+    for a different side closes any open position and opens the new one at
+    the bar's close, investing ``fraction * |signal|`` of the equity at that
+    moment; a signal for the side already held is ignored. Open positions
+    exit when the bar's ``low``/``high`` reach the ``stop_loss``, the
+    ``trailing_stop`` (both fractions below the entry, or below the best
+    price since entry) or the ``take_profit`` above the entry; a stop wins
+    when both are reached in the same bar. Exits fill at their level, or at
+    the bar's ``open`` when it gaps through the level: a long stop fills at
+    ``min(open, stop)`` and a short one at ``max(open, stop)``. Without
+    ``open``, each bar opens at the previous close. Fees and slippage apply
+    to every fill as in ``backtest``.
+
+    The loop over bars is compiled to machine code by numba, and gives the
+    same results as ``event_backtest_reference`` bit for bit.
+    """
+    return _run_event_loop(True, close, signals, high, low, open, stop_loss, take_profit,
+                           trailing_stop, fraction, fee, slippage, initial_capital, times, periods_per_year)
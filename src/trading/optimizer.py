@@ -0,0 +1,131 @@
+"""
+Parameter sweeps of a strategy over one price series, on all cores.
+
+Grid search tries every combination of the given values; random search
+draws combinations from them. The series is copied once into shared memory,
+which every worker keeps attached and reads in place, so the data is neither
+pickled per task nor copied per worker. Each worker keeps its own
+IndicatorCache, so an indicator is computed once per worker and parameter
+value rather than once per combination. The cache budget is split between
+the workers, so a sweep stays within it.
+Combinations go out in batches, and each batch's statistics come back as
+soon as it completes.
+"""
+import itertools
+import math
+import os
+from concurrent.futures import as_completed
+
+import numpy as np
+import polars as pl
+
+from data.data_generator import OHLCV_COLUMNS
+from trading.backtester import bars_per_year
+from trading.strategy_base import DEFAULT_CACHE_MB, IndicatorCache, load_strategy
+from utils.process_pool import process_pool
+from utils.shared_arrays import SharedArray
+
+BATCHES_PER_WORKER = 8  # Enough batches to balance the load and stream results
+
+# Per-process state of a sweep worker, set up by _init_worker
+_worker = {}
+
+
+def grid(ranges):
+    """Every combination of ``ranges``, a dict of parameter names to sequences of values."""
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*(list(ranges[name]) for name in names))]
+
+
+def random_search(ranges, n, seed=None):
+    """
+    ``n`` combinations drawn from ``ranges``.
+
+    A ``(low, high)`` tuple is sampled uniformly, as integers when both
+    bounds are integers; any other sequence is sampled from its values.
+    """
+    rng = np.random.default_rng(seed)
+    draws = {}
+    for name, values in ranges.items():
+        if isinstance(values, tuple) and len(values) == 2:
+            low, high = values
+            if isinstance(low, int) and isinstance(high, int):
+                draws[name] = rng.integers(low, high, n, endpoint=True).tolist()
+            else:
+                draws[name] = rng.uniform(low, high, n).tolist()
+        else:
+            values = list(values)
+            draws[name] = [values[i] for i in rng.integers(0, len(values), n)]
+    return [{name: draws[name][i] for name in ranges} for i in range(n)]
+
+
+def results_frame(rows):
+    """Sweep result rows as a frame: the parameters, then the backtest statistics."""
+    return pl.DataFrame(rows, infer_schema_length=None)
+
+
+def _init_worker(spec, columns, strategy, periods_per_year, cache_bytes):
+    # The block stays attached for the life of the worker, and the frame views its columns
+    shared = SharedArray.attach(spec)
+    data = pl.DataFrame({name: shared.array[i] for i, name in enumerate(columns)})
+    if isinstance(strategy, str):
+        strategy, _ = load_strategy(strategy)
+    _worker.update(shared=shared, data=data, strategy=strategy, periods_per_year=periods_per_year,
+                   cache=IndicatorCache(cache_bytes), key=spec[0])
+
+
+def _run_batch(param_sets):
+    """Worker entry point: backtest a batch of parameter combinations."""
+    rows = []
+    for params in param_sets:
+        result = _worker["strategy"](**params).run(_worker["data"], _worker["cache"],
+                                                   periods_per_year=_worker["periods_per_year"],
+                                                   dataset_key=_worker["key"])
+        rows.append({**params, **result.stats()})
+    return rows
+
+
+def sweep(strategy, param_sets, data, time_column="timestamp", workers=None, on_results=None,
+          progress=None, cache_mb=DEFAULT_CACHE_MB):
+    """
+    Backtest ``strategy`` with every dict of parameters in ``param_sets`` on ``data``.
+
+    ``strategy`` is a StrategyBase subclass importable by the workers, or
+    editor code defining one. ``on_results`` receives each completed
+    batch's rows, and ``progress`` the fraction of combinations done; an
+    exception either raises cancels the batches that have not started.
+    ``cache_mb`` is shared out between the workers' caches.
+
+    Returns a frame of the parameters and statistics of every combination.
+    """
+    param_sets = list(param_sets)
+    if not param_sets:
+        return results_frame([])
+    columns = [name for name in OHLCV_COLUMNS[1:] if name in data.columns]
+    periods_per_year = None
+    if time_column in data.columns:
+        periods_per_year = bars_per_year(data.get_column(time_column).to_numpy())
+    workers = min(workers or os.cpu_count() or 1, len(param_sets))
+    batch_size = math.ceil(len(param_sets) / (workers * BATCHES_PER_WORKER))
+    batches = [param_sets[i:i + batch_size] for i in range(0, len(param_sets), batch_size)]
+
+    rows = []
+    with SharedArray.create((len(columns), len(data))) as shared:
+        for i, name in enumerate(columns):
+            shared.array[i] = data.get_column(name).to_numpy()
+        pool = process_pool(workers, initializer=_init_worker,
+                            initargs=(shared.spec, columns, strategy, periods_per_year,
+                                      (int(cache_mb) << 20) // workers))
+        try:
+            futures = [pool.submit(_run_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                batch_rows = future.result()
+                rows.extend(batch_rows)
+                if on_results is not None:
+                    on_results(batch_rows)
+                if progress is not None:
+                    progress(len(rows) / len(param_sets))
+        finally:
+            # Batches still queued are dropped when the loop above is interrupted
+            pool.shutdown(cancel_futures=True)
+    return results_frame(rows)
@@ -1 +1,28 @@
+"""
+Moving average crossover, sized to a volatility target.
 
+Long when the fast average is above the slow one and short below it. The
+position shrinks as the average true range grows relative to the price, so
+each bar risks roughly the same fraction of equity.
+"""
+import numpy as np
+
+from trading.strategy_base import ATR, SMA, StrategyBase
+
+
+class MovingAverageCrossover(StrategyBase):
+    fast = 20
+    slow = 50
+    atr_period = 14
+    target_range = 0.01  # Average true range, as a fraction of the price, held at full size
+
+    def indicators(self):
+        return {"fast": SMA(self.fast), "slow": SMA(self.slow), "atr": ATR(self.atr_period)}
+
+    def positions(self, data, indicators):
+        close = data.get_column("close").to_numpy()
+        side = np.sign(indicators["fast"] - indicators["slow"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            size = np.minimum(self.target_range * close / indicators["atr"], 1.0)
+        # Flat until every indicator has warmed up
+        return np.nan_to_num(side * size)
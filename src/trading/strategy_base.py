@@ -1 +1,240 @@
+"""
+Base class for strategies, and the cache their indicators are computed into.
 
+A strategy lists the indicators it needs, such as ``SMA(20)`` or ``ATR(14)``,
+and receives them already computed when it turns a frame into positions.
+Indicators are computed through an ``IndicatorCache``, keyed by the
+indicator, its parameters and the content of the columns it reads, so each
+combination is computed once. The main window keeps one cache for the
+session: re-running a strategy after editing its code recomputes nothing
+unless the data or the indicator parameters changed.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import polars as pl
+
+from computation.numerical_methods import INDICATORS
+from trading.backtester import DEFAULT_FEE, DEFAULT_SLIPPAGE, backtest
+
+DEFAULT_CACHE_MB = 1000  # Matches the Cache Size spin box of the Settings dialog
+# Available to strategy code without an import
+STRATEGY_NAMES = ("StrategyBase", "SMA", "EMA", "STD", "MIN", "MAX", "RSI", "ATR")
+
+
+class Indicator(namedtuple("Indicator", "name params columns")):
+    """
+    One indicator of ``numerical_methods.INDICATORS`` with its parameters.
+
+    ``columns`` are the frame columns passed to the indicator function, in
+    order; the factories below fill in the usual ones.
+    """
+
+    def compute(self, data):
+        function, _ = INDICATORS[self.name]
+        return function(*(data.get_column(column).to_numpy() for column in self.columns), *self.params)
+
+    def __str__(self):
+        params = ", ".join(map(str, self.params))
+        return f"{self.name}({params})"
+
+
+def _indicator(name, params, column):
+    _, columns = INDICATORS[name]
+    return Indicator(name, tuple(params), columns if column is None else (column,))
+
+
+def SMA(window, column=None):
+    return _indicator("SMA", (window,), column)
+
+
+def EMA(span, column=None):
+    return _indicator("EMA", (span,), column)
+
+
+def STD(window, column=None):
+    return _indicator("STD", (window,), column)
+
+
+def MIN(window, column=None):
+    return _indicator("MIN", (window,), column)
+
+
+def MAX(window, column=None):
+    return _indicator("MAX", (window,), column)
+
+
+def RSI(period=14, column=None):
+    return _indicator("RSI", (period,), column)
+
+
+def ATR(period=14):
+    return _indicator("ATR", (period,), None)
+
+
+def column_key(values):
+    """Content fingerprint of a column, so equal data hits the same cache entries."""
+    values = np.ascontiguousarray(values)
+    digest = hashlib.blake2b(values.view(np.uint8), digest_size=16).digest()
+    return values.dtype.str, len(values), digest
+
+
+class IndicatorCache:
+    """
+    Least recently used store of computed indicators, bounded in bytes.
+
+    Cached arrays are read-only and shared between runs. An indicator larger
+    than the whole budget is returned but not kept. Safe to use from the
+    background job that runs a strategy while the GUI thread resizes it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB << 20):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._entries:
+            _, values = self._entries.popitem(last=False)
+            self.nbytes -= values.nbytes
+
+    def _lookup(self, key):
+        with self._lock:
+            values = self._entries.get(key)
+            if values is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return values
+
+    def _store(self, key, values):
+        values.setflags(write=False)
+        if values.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = values
+                self.nbytes += values.nbytes
+            self._evict()
+
+    def compute(self, indicators, data, dataset_key=None):
+        """
+        Values of ``indicators`` (a dict of names to Indicator) on the frame ``data``.
+
+        Each input column is fingerprinted once per call, however many
+        indicators read it. A caller that already knows which data it holds
+        can pass a ``dataset_key`` instead, which must change with the data,
+        and skip the fingerprints.
+        """
+        keys = {}
+        values = {}
+        for name, indicator in indicators.items():
+            for column in indicator.columns:
+                if column not in keys:
+                    keys[column] = ((dataset_key, column) if dataset_key is not None
+                                    else column_key(data.get_column(column).to_numpy()))
+            key = (indicator.name, indicator.params, tuple(keys[column] for column in indicator.columns))
+            cached = self._lookup(key)
+            if cached is None:
+                cached = np.asarray(indicator.compute(data), dtype=np.float64)
+                self._store(key, cached)
+            values[name] = cached
+        return values
+
+
+class StrategyBase:
+    """
+    A strategy for Run Strategy.
+
+    Subclasses return the indicators they need from ``indicators`` and turn
+    the computed values into one target position per bar in ``positions``.
+    Parameters are class attributes, overridden per instance through the
+    constructor, so ``indicators`` can depend on them::
+
+        class Crossover(StrategyBase):
+            fast = 20
+            slow = 50
+
+            def indicators(self):
+                return {"fast": SMA(self.fast), "slow": SMA(self.slow)}
+
+            def positions(self, data, indicators):
+                return np.where(indicators["fast"] > indicators["slow"], 1.0, 0.0)
+    """
+
+    fee = DEFAULT_FEE
+    slippage = DEFAULT_SLIPPAGE
+
+    def __init__(self, **params):
+        for name, value in params.items():
+            if not hasattr(type(self), name):
+                raise TypeError(f"{type(self).__name__} has no parameter {name!r}")
+            setattr(self, name, value)
+
+    def indicators(self):
+        """Indicators by the name ``positions`` looks them up under."""
+        return {}
+
+    def positions(self, data, indicators):
+        """Target position per bar of ``data``, as a fraction of equity."""
+        raise NotImplementedError
+
+    def run(self, data, cache=None, time_column="timestamp", periods_per_year=None, dataset_key=None,
+            window=None):
+        """
+        Compute the indicators (through ``cache`` when given) and backtest the positions.
+
+        A ``(start, stop)`` ``window`` backtests only those bars. Indicators
+        are still computed over all of ``data`` and then sliced, so they carry
+        their history into the window, and windows of the same data share
+        the cached values.
+        """
+        required = self.indicators()
+        if cache is None:
+            indicators = {name: indicator.compute(data) for name, indicator in required.items()}
+        else:
+            indicators = cache.compute(required, data, dataset_key)
+        if window is not None:
+            start, stop = window
+            data = data.slice(start, stop - start)
+            indicators = {name: values[start:stop] for name, values in indicators.items()}
+        times = None
+        if periods_per_year is None and time_column in data.columns:
+            times = data.get_column(time_column).to_numpy()
+        return backtest(data.get_column("close").to_numpy(), self.positions(data, indicators),
+                        fee=self.fee, slippage=self.slippage, times=times, periods_per_year=periods_per_year)
+
+
+def load_strategy(code):
+    """
+    Execute strategy code from the editor.
+
+    Returns the last ``StrategyBase`` subclass the code defines, or None,
+    and the namespace the code ran in.
+    """
+    namespace = {"__name__": "<strategy>", "np": np, "pl": pl,
+                 **{name: globals()[name] for name in STRATEGY_NAMES}}
+    exec(compile(code, "<strategy>", "exec"), namespace)
+    strategies = [value for value in namespace.values()
+                  if isinstance(value, type) and issubclass(value, StrategyBase)
+                  and value.__module__ == "<strategy>"]
+    return (strategies[-1] if strategies else None), namespace
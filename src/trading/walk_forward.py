@@ -0,0 +1,155 @@
+"""
+Walk-forward tests of a strategy over many Monte Carlo paths.
+
+Each path is cut into rolling windows: a training window, optionally used to
+pick the best parameters from a grid, followed by the test window the
+strategy is scored on. Every (path, window) pair is one task for a process
+pool. The paths sit in one shared memory block that the workers attach to.
+Indicators are computed over a whole path and sliced for each window, so a
+worker's IndicatorCache serves every window of a path it has seen, however
+much the windows overlap. The results are summarised as distributions of
+the test statistics across paths and windows.
+"""
+import math
+import os
+from concurrent.futures import as_completed
+
+import numpy as np
+import polars as pl
+
+from data.data_generator import OHLCV_COLUMNS
+from trading.backtester import bars_per_year
+from trading.optimizer import results_frame
+from trading.strategy_base import DEFAULT_CACHE_MB, IndicatorCache, load_strategy
+from utils.process_pool import process_pool
+from utils.shared_arrays import SharedArray
+
+SUMMARY_METRICS = ("sharpe", "max_drawdown", "total_return")
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Per-process state of a walk-forward worker, set up by _init_worker
+_worker = {}
+
+
+def rolling_windows(n_bars, train, test, step=None):
+    """``(train_start, test_start, test_stop)`` of every window fitting in ``n_bars``; ``step`` defaults to ``test``."""
+    train, test = int(train), int(test)
+    if train < 0 or test < 1:
+        raise ValueError("Walk-forward windows need train >= 0 and test >= 1 bars")
+    step = int(step or test)
+    return [(start, start + train, start + train + test)
+            for start in range(0, n_bars - train - test + 1, step)]
+
+
+def _init_worker(spec, columns, strategy, periods_per_year, cache_bytes):
+    # The block stays attached for the life of the worker; paths are read as needed
+    shared = SharedArray.attach(spec)
+    if isinstance(strategy, str):
+        strategy, _ = load_strategy(strategy)
+    _worker.update(shared=shared, columns=columns, strategy=strategy, periods_per_year=periods_per_year,
+                   cache=IndicatorCache(cache_bytes), key=spec[0], path=None, data=None)
+
+
+def _path_frame(path):
+    """The frame of one path, kept while consecutive tasks use the same path."""
+    if _worker["path"] != path:
+        array = _worker["shared"].array
+        _worker["data"] = pl.DataFrame({name: array[i, path] for i, name in enumerate(_worker["columns"])})
+        _worker["path"] = path
+    return _worker["data"]
+
+
+def _run_window(path, window, param_sets, metric):
+    """Worker entry point: optionally fit on the training window, then score the test window."""
+    data = _path_frame(path)
+    strategy = _worker["strategy"]
+    options = {"cache": _worker["cache"], "periods_per_year": _worker["periods_per_year"],
+               "dataset_key": (_worker["key"], path)}
+    train_start, test_start, test_stop = window
+
+    params = {}
+    if param_sets:
+        best = -math.inf
+        for candidate in param_sets:
+            score = strategy(**candidate).run(data, window=(train_start, test_start), **options).stats()[metric]
+            if score is not None and score > best:
+                best, params = score, candidate
+    stats = strategy(**params).run(data, window=(test_start, test_stop), **options).stats()
+    return {"path": path, "train_start": train_start, "test_start": test_start, "test_stop": test_stop,
+            **params, **stats}
+
+
+def walk_forward(strategy, paths, train, test, step=None, param_sets=None, metric="sharpe", workers=None,
+                 cache_mb=DEFAULT_CACHE_MB, progress=None):
+    """
+    Walk-forward test of ``strategy`` on every path of ``paths``.
+
+    ``paths`` is the dict returned by ``generate_paths``: a ``timestamp``
+    array and ``(n_paths, n_points)`` OHLCV arrays. Windows come from
+    ``rolling_windows``. With ``param_sets``, each training window picks the
+    combination with the highest ``metric`` for its test window. ``strategy``
+    is a StrategyBase subclass importable by the workers, or editor code
+    defining one. ``cache_mb`` is shared out between the workers' caches.
+
+    Returns one row per (path, window) with the chosen parameters and the
+    test window's statistics.
+    """
+    columns = [name for name in OHLCV_COLUMNS[1:] if name in paths]
+    n_paths, n_bars = np.shape(paths[columns[0]])
+    windows = rolling_windows(n_bars, train, test, step)
+    if not windows:
+        raise ValueError(f"Paths of {n_bars:,} bars are too short for {train:,} + {test:,} bar windows")
+    param_sets = list(param_sets or [])
+    periods_per_year = bars_per_year(paths["timestamp"]) if "timestamp" in paths else None
+    workers = min(workers or os.cpu_count() or 1, n_paths * len(windows))
+
+    rows = []
+    with SharedArray.create((len(columns), n_paths, n_bars)) as shared:
+        for i, name in enumerate(columns):
+            shared.array[i] = paths[name]
+        pool = process_pool(workers, initializer=_init_worker,
+                            initargs=(shared.spec, columns, strategy, periods_per_year,
+                                      (int(cache_mb) << 20) // workers))
+        try:
+            # Path-major order, so a worker tends to take several windows of the path it has cached
+            futures = [pool.submit(_run_window, path, window, param_sets, metric)
+                       for path in range(n_paths) for window in windows]
+            for future in as_completed(futures):
+                rows.append(future.result())
+                if progress is not None:
+                    progress(len(rows) / len(futures))
+        finally:
+            # Tasks still queued are dropped when the loop above is interrupted
+            pool.shutdown(cancel_futures=True)
+    return results_frame(rows).sort("path", "test_start")
+
+
+def distribution(results, metrics=SUMMARY_METRICS):
+    """Mean, spread and quantiles of each test statistic across paths and windows."""
+    rows = []
+    for metric in metrics:
+        values = results.get_column(metric).drop_nulls().cast(pl.Float64)
+        row = {"metric": metric, "count": len(values), "mean": values.mean(), "std": values.std()}
+        row.update({f"p{round(q * 100)}": values.quantile(q, "linear") for q in SUMMARY_QUANTILES})
+        rows.append(row)
+    return pl.DataFrame(rows)
+
+
+def summary(results, metrics=SUMMARY_METRICS):
+    """The distribution of the test statistics as text for the Stats tab."""
+    table = distribution(results, metrics)
+    quantiles = [f"p{round(q * 100)}" for q in SUMMARY_QUANTILES]
+
+    def number(value):
+        return "n/a" if value is None else f"{value:.3f}"
+
+    lines = [
+        f"Walk-forward: {results.get_column('path').n_unique():,} paths, "
+        f"{len(results):,} test windows",
+        "",
+        f"{'':<14}{'mean':>9}{'std':>9}" + "".join(f"{name:>9}" for name in quantiles)
+    ]
+    for row in table.iter_rows(named=True):
+        lines.append(f"{row['metric']:<14}{number(row['mean']):>9}{number(row['std']):>9}"
+                     + "".join(f"{number(row[name]):>9}" for name in quantiles))
+    return "\n".join(lines)
@@ -0,0 +1,157 @@
+from pathlib import Path
+
+from PySide6.QtWidgets import QDialog, QFileDialog, QFormLayout, QGroupBox, QComboBox, QMessageBox
+
+from data.data_loader import CSV_TYPES, LazyDataset, csv_types, detect_format, sample_csv
+from ui.generated_ui import Ui_LoadDataDialog
+from ui.table_model import FrameTableModel
+
+# Order matches the delimiter combo in Ui_LoadDataDialog
+SEPARATORS = (",", "\t", ";")
+PREVIEW_ROWS = 100
+
+DATA_FILE_FILTER = (
+    "Data Files (*.parquet *.arrow *.ipc *.feather *.csv);;Parquet Files (*.parquet);;"
+    "Arrow IPC Files (*.arrow *.ipc *.feather);;CSV Files (*.csv);;All Files (*.*)"
+)
+
+
+class LoadDataDialog(QDialog):
+    """
+    Picks a data file and, for CSV files, the import options.
+
+    The preview is parsed from a small sample of the file, so it fills in
+    milliseconds however large the file is. Column types inferred from the
+    sample can be overridden, and are remembered per file: reopening the
+    file restores them without running inference again.
+    """
+
+    def __init__(self, settings, parent=None, path=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.ui = Ui_LoadDataDialog()
+        self.ui.setupUi(self)
+        self.ui.header_spin.setRange(0, 1000)
+
+        self.model = FrameTableModel()
+        self.ui.preview_table.setModel(self.model)
+
+        # Column type overrides, rebuilt for each CSV file
+        self.types_group = QGroupBox("Column Types")
+        self.types_layout = QFormLayout(self.types_group)
+        self.ui.verticalLayout.insertWidget(2, self.types_group)
+        self.type_combos = {}
+
+        self.ui.browse_btn.clicked.connect(self.browse)
+        self.ui.file_path.editingFinished.connect(self.load_options)
+        self.ui.delimiter_combo.currentIndexChanged.connect(self.infer_types)
+        self.ui.header_spin.valueChanged.connect(self.infer_types)
+
+        if path:
+            self.ui.file_path.setText(str(path))
+        self.load_options()
+
+    def path(self):
+        return self.ui.file_path.text().strip()
+
+    def is_csv(self):
+        try:
+            return detect_format(self.path()) == "csv"
+        except ValueError:
+            return False
+
+    def browse(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Load Data File", self.path(), DATA_FILE_FILTER)
+        if file_name:
+            self.ui.file_path.setText(file_name)
+            self.load_options()
+
+    def load_options(self):
+        """Restores the options remembered for the file, or infers them from a sample"""
+        is_csv = self.is_csv()
+        self.ui.options_group.setEnabled(is_csv)
+        self.types_group.setVisible(is_csv)
+        remembered = self.settings.get_csv_import(self.path()) if is_csv else None
+        if remembered is None:
+            self.infer_types()
+            return
+        self.ui.delimiter_combo.blockSignals(True)
+        self.ui.header_spin.blockSignals(True)
+        try:
+            self.ui.delimiter_combo.setCurrentIndex(SEPARATORS.index(remembered["separator"]))
+            self.ui.header_spin.setValue(remembered["header_row"])
+        finally:
+            self.ui.delimiter_combo.blockSignals(False)
+            self.ui.header_spin.blockSignals(False)
+        self.update_preview(remembered["types"], infer_on_error=True)
+
+    def separator(self):
+        return SEPARATORS[self.ui.delimiter_combo.currentIndex()]
+
+    def infer_types(self):
+        self.update_preview(None)
+
+    def update_preview(self, types, infer_on_error=False):
+        """Fills the preview from a sample; ``types`` None infers them from it"""
+        path = self.path()
+        if not path or not Path(path).is_file():
+            self.model.set_frame(None)
+            return
+        try:
+            if self.is_csv():
+                preview, sample = sample_csv(path, PREVIEW_ROWS, self.separator(),
+                                             self.ui.header_spin.value(), types)
+                if types is None:
+                    self.set_types(csv_types(sample))
+                elif list(types) != list(self.type_combos):
+                    self.set_types(types)
+            else:
+                preview = LazyDataset(path).scan().head(PREVIEW_ROWS).collect()
+        except Exception as e:
+            # Remembered types no longer match the file, fall back to inference
+            if infer_on_error:
+                self.update_preview(None)
+                return
+            # Options are often mid-edit, so report the error without a modal box
+            self.model.set_frame(None)
+            self.ui.preview_group.setTitle(f"Data Preview (could not read the file: {str(e).splitlines()[0]})")
+            return
+        self.ui.preview_group.setTitle("Data Preview")
+        self.model.set_frame(preview)
+
+    def set_types(self, types):
+        while self.types_layout.rowCount():
+            self.types_layout.removeRow(0)
+        self.type_combos = {}
+        for name, type_name in types.items():
+            combo = QComboBox()
+            combo.addItems(list(CSV_TYPES))
+            combo.setCurrentText(type_name)
+            combo.currentTextChanged.connect(lambda _: self.update_preview(self.types()))
+            self.types_layout.addRow(f"{name}:", combo)
+            self.type_combos[name] = combo
+
+    def types(self):
+        return {name: combo.currentText() for name, combo in self.type_combos.items()}
+
+    def csv_options(self):
+        """Keyword arguments for read_csv"""
+        return {"types": self.types(), "separator": self.separator(), "header_row": self.ui.header_spin.value()}
+
+    def time_column(self):
+        """The first datetime column, which the views are indexed by"""
+        for name, type_name in self.types().items():
+            if type_name == "Datetime":
+                return name
+        return None
+
+    def accept(self):
+        if not Path(self.path()).is_file():
+            QMessageBox.warning(self, "Load Data", "Please select a data file")
+            return
+        if self.is_csv():
+            if self.time_column() is None:
+                QMessageBox.warning(self, "Load Data", "Please mark the time column as Datetime")
+                return
+            self.settings.set_csv_import(self.path(), self.csv_options())
+        super().accept()
@@ -0,0 +1,22 @@
+from PySide6.QtWidgets import QDialog
+
+from ui.generated_ui import Ui_SettingsDialog
+
+
+class SettingsDialog(QDialog):
+    """Application settings; the values are written back to ``Settings`` on accept."""
+
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.ui = Ui_SettingsDialog()
+        self.ui.setupUi(self)
+        self.ui.theme_combo.setCurrentIndex(0 if settings.get_theme() == 'light' else 1)
+        self.ui.cache_spin.setValue(settings.get_cache_size())
+
+    def theme_index(self):
+        return self.ui.theme_combo.currentIndex()
+
+    def accept(self):
+        self.settings.set_cache_size(self.ui.cache_spin.value())
+        super().accept()
@@ -0,0 +1,81 @@
+import numpy as np
+from PySide6.QtWidgets import (QComboBox, QDialog, QFormLayout, QHBoxLayout, QLabel, QPlainTextEdit,
+                               QPushButton, QSpinBox, QTableView, QVBoxLayout)
+
+from trading.optimizer import grid, random_search
+from ui.table_model import FrameTableModel
+
+DEFAULT_RANGES = "fast = range(5, 55, 5)\nslow = range(20, 220, 20)\n"
+
+
+def parse_ranges(text):
+    """Parameter ranges from ``name = expression`` lines; raises ValueError on a malformed line"""
+    ranges = {}
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        name, separator, expression = line.partition("=")
+        if not separator or not name.strip().isidentifier():
+            raise ValueError(f"Expected 'name = values', got {line!r}")
+        ranges[name.strip()] = eval(expression, {"np": np, "range": range})
+    return ranges
+
+
+class SweepDialog(QDialog):
+    """
+    Parameter ranges for a sweep of the editor's strategy, and its results.
+
+    Each line of the ranges box is ``name = expression``. In a grid search the
+    expression gives the values to try, e.g. ``range(5, 55, 5)`` or
+    ``[0.01, 0.02]``; in a random search a ``(low, high)`` tuple is sampled
+    uniformly instead. The dialog is not modal, so results can be sorted and
+    read while the sweep runs.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Parameter Sweep")
+        self.resize(700, 600)
+
+        self.ranges_edit = QPlainTextEdit(DEFAULT_RANGES)
+        self.ranges_edit.setPlaceholderText("name = values, one parameter per line")
+        self.ranges_edit.setMaximumHeight(120)
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["Grid", "Random"])
+        self.samples_spin = QSpinBox()
+        self.samples_spin.setRange(1, 1_000_000)
+        self.samples_spin.setValue(1000)
+        self.samples_spin.setEnabled(False)
+        self.mode_combo.currentTextChanged.connect(lambda mode: self.samples_spin.setEnabled(mode == "Random"))
+
+        options = QFormLayout()
+        options.addRow("Parameters:", self.ranges_edit)
+        options.addRow("Search:", self.mode_combo)
+        options.addRow("Samples:", self.samples_spin)
+
+        self.run_btn = QPushButton("Run")
+        self.stop_btn = QPushButton("Stop")
+        self.count_label = QLabel()
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.count_label, 1)
+        buttons.addWidget(self.run_btn)
+        buttons.addWidget(self.stop_btn)
+
+        self.model = FrameTableModel()
+        self.results_table = QTableView()
+        self.results_table.setModel(self.model)
+        self.results_table.setSortingEnabled(True)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(options)
+        layout.addLayout(buttons)
+        layout.addWidget(self.results_table, 1)
+
+    def parameter_sets(self, seed=None):
+        ranges = parse_ranges(self.ranges_edit.toPlainText())
+        if not ranges:
+            raise ValueError("Enter at least one parameter range")
+        if self.mode_combo.currentText() == "Random":
+            return random_search(ranges, self.samples_spin.value(), seed)
+        return grid(ranges)
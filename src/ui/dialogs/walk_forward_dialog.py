@@ -0,0 +1,71 @@
+from PySide6.QtWidgets import (QComboBox, QDialog, QDialogButtonBox, QFormLayout, QMessageBox, QPlainTextEdit,
+                               QSpinBox, QVBoxLayout)
+
+from data.presets import PRICE_PRESETS
+from trading.optimizer import grid
+from ui.dialogs.sweep_dialog import parse_ranges
+
+CURRENT_SETTINGS = "Current Price Settings"
+
+
+class WalkForwardDialog(QDialog):
+    """
+    Options of a walk-forward test: the Monte Carlo paths to generate, the
+    window lengths and, optionally, a parameter grid refitted on every
+    training window.
+    """
+
+    def __init__(self, n_points, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Walk-Forward Test")
+
+        self.preset_combo = QComboBox()
+        self.preset_combo.addItems([CURRENT_SETTINGS, *PRICE_PRESETS])
+        self.paths_spin = self._spin(1, 100_000, 100)
+        self.points_spin = self._spin(100, 100_000_000, n_points)
+        self.train_spin = self._spin(0, 100_000_000, max(n_points // 4, 0))
+        self.test_spin = self._spin(1, 100_000_000, max(n_points // 8, 1))
+        self.ranges_edit = QPlainTextEdit()
+        self.ranges_edit.setPlaceholderText("Optional, e.g. fast = range(5, 55, 5), one parameter per line")
+        self.ranges_edit.setMaximumHeight(100)
+
+        form = QFormLayout()
+        form.addRow("Paths from:", self.preset_combo)
+        form.addRow("Paths:", self.paths_spin)
+        form.addRow("Bars per path:", self.points_spin)
+        form.addRow("Training bars:", self.train_spin)
+        form.addRow("Test bars:", self.test_spin)
+        form.addRow("Parameter grid:", self.ranges_edit)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+
+    @staticmethod
+    def _spin(minimum, maximum, value):
+        spin = QSpinBox()
+        spin.setRange(minimum, maximum)
+        spin.setValue(min(max(value, minimum), maximum))
+        return spin
+
+    def preset(self):
+        """The price preset the paths follow, None for the Price Settings panel"""
+        text = self.preset_combo.currentText()
+        return None if text == CURRENT_SETTINGS else text
+
+    def parameter_sets(self):
+        return grid(parse_ranges(self.ranges_edit.toPlainText())) if self.ranges_edit.toPlainText().strip() else []
+
+    def accept(self):
+        if self.train_spin.value() + self.test_spin.value() > self.points_spin.value():
+            QMessageBox.warning(self, "Walk-Forward Test", "The paths are shorter than one training and test window")
+            return
+        try:
+            self.parameter_sets()
+        except Exception as e:
+            QMessageBox.warning(self, "Walk-Forward Test", f"Invalid parameter grid: {e}")
+            return
+        super().accept()
@@ -35,3 +35,26 @@ class Settings:
     def set_theme(self, theme):
         self.settings['theme'] = theme
         self._save_settings(self.settings)
+
+    def get_seed(self):
+        return self.settings.get('seed', 42)
+
+    def set_seed(self, seed):
+        self.settings['seed'] = seed
+        self._save_settings(self.settings)
+
+    def get_csv_import(self, path):
+        """Import options (separator, header row, column types) remembered for a CSV file"""
+        return self.settings.get('csv_imports', {}).get(str(Path(path).resolve()))
+
+    def set_csv_import(self, path, options):
+        self.settings.setdefault('csv_imports', {})[str(Path(path).resolve())] = options
+        self._save_settings(self.settings)
+
+    def get_cache_size(self):
+        """Budget in MB of the indicator cache and the on-disk dataset cache, from the Settings dialog"""
+        return self.settings.get('cache_size_mb', 1000)
+
+    def set_cache_size(self, size_mb):
+        self.settings['cache_size_mb'] = size_mb
+        self._save_settings(self.settings)
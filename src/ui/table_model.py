@@ -0,0 +1,82 @@
+import polars as pl
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class FrameTableModel(QAbstractTableModel):
+    """
+    Read-only table model over a Polars DataFrame.
+
+    Columns are converted to Python lists the first time one of their cells
+    is shown, so views only pay for the columns they display.
+    """
+
+    def __init__(self, frame=None, precision=4, parent=None):
+        super().__init__(parent)
+        self.precision = precision
+        self._frame = None
+        self._columns = {}
+        # Column name and direction of the last sort, kept as rows are appended
+        self._sort_key = None
+        self.set_frame(frame)
+
+    def set_frame(self, frame):
+        self.beginResetModel()
+        self._frame = frame
+        self._columns = {}
+        self.endResetModel()
+
+    def append(self, frame):
+        """Adds rows, keeping the current sort order"""
+        if self._frame is not None and self._frame.height:
+            frame = pl.concat([self._frame, frame], how="diagonal_relaxed")
+        if self._sort_key is not None and self._sort_key[0] in frame.columns:
+            frame = frame.sort(self._sort_key[0], descending=self._sort_key[1], nulls_last=True)
+        self.set_frame(frame)
+
+    def frame(self):
+        return self._frame
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._frame is None:
+            return 0
+        return self._frame.height
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._frame is None:
+            return 0
+        return self._frame.width
+
+    def _column(self, index):
+        if index not in self._columns:
+            self._columns[index] = self._frame.to_series(index).to_list()
+        return self._columns[index]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            value = self._column(index.column())[index.row()]
+            if value is None:
+                return ""
+            if isinstance(value, float):
+                return f"{value:.{self.precision}f}"
+            return str(value)
+        if role == Qt.TextAlignmentRole and self._frame.dtypes[index.column()].is_numeric():
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or self._frame is None:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._frame.columns[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if self._frame is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._sort_key = (self._frame.columns[column], order == Qt.DescendingOrder)
+        self._frame = self._frame.sort(self._sort_key[0], descending=self._sort_key[1], nulls_last=True)
+        self._columns = {}
+        self.layoutChanged.emit()
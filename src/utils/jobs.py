@@ -0,0 +1,168 @@
+"""
+Background jobs that keep the Qt event loop responsive.
+
+Jobs run on a QThreadPool and report progress, results and errors through
+Qt signals, which are delivered on the GUI thread. Results are handed over
+by reference: the frames and arrays a job builds are shared with the GUI,
+and jobs that fan out to worker processes collect their output in shared
+memory (see ``utils.shared_arrays``), so nothing is pickled on the way back.
+
+Every job belongs to a resource such as "data" or "strategy". A resource
+runs at most one job at a time, so a second click on Generate Data cannot
+race the first one over the same state.
+"""
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtWidgets import QProgressBar
+
+PROGRESS_STEPS = 1000
+
+
+class JobCancelled(Exception):
+    """Raised inside a cancelled job at its next progress report."""
+
+
+class _JobSignals(QObject):
+    progress = Signal(float, str)
+    partial = Signal(object)
+    finished = Signal(object)
+    failed = Signal(object)
+    cancelled = Signal()
+
+
+class Job(QRunnable):
+    """
+    One call of ``function(job, *args, **kwargs)`` on a pool thread.
+
+    The function reports progress with ``job.progress(fraction, message)``,
+    which is also where cancellation takes effect: once ``cancel`` has been
+    called, the next report raises JobCancelled and the job ends quietly.
+    """
+
+    def __init__(self, resource, label, function, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.resource = resource
+        self.label = label
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _JobSignals()
+        self._cancelled = threading.Event()
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        """Raise JobCancelled if the job has been cancelled."""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def progress(self, fraction, message=""):
+        self.check()
+        self.signals.progress.emit(float(fraction), message)
+
+    def publish(self, value):
+        """Hand a partial result to the GUI thread while the job keeps running."""
+        self.signals.partial.emit(value)
+
+    def run(self):
+        try:
+            result = self.function(self, *self.args, **self.kwargs)
+            self.check()
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class JobRunner(QObject):
+    """
+    Starts jobs on a thread pool, one per resource, and shows their
+    progress in the status bar.
+
+    Callbacks passed to ``submit`` run on the GUI thread, so they may touch
+    widgets and window state freely.
+    """
+
+    def __init__(self, statusbar=None, pool=None, parent=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.statusbar = statusbar
+        self.jobs = {}
+        self.progress_bar = None
+        if statusbar is not None:
+            self.progress_bar = QProgressBar()
+            self.progress_bar.setRange(0, PROGRESS_STEPS)
+            self.progress_bar.setMaximumWidth(160)
+            self.progress_bar.setTextVisible(False)
+            self.progress_bar.hide()
+            statusbar.addPermanentWidget(self.progress_bar)
+
+    def is_busy(self, resource):
+        return resource in self.jobs
+
+    def submit(self, resource, label, function, *args, on_finished=None, on_failed=None,
+               on_cancelled=None, on_partial=None, **kwargs):
+        """
+        Runs ``function(job, *args, **kwargs)`` in the background.
+
+        ``on_partial`` receives every value the job passes to ``publish``.
+
+        Returns the Job, or None when ``resource`` is still busy with another.
+        """
+        if resource in self.jobs:
+            self.show_message(f"{self.jobs[resource].label} is still running")
+            return None
+        job = Job(resource, label, function, *args, **kwargs)
+        job.signals.progress.connect(lambda fraction, message: self._progress(job, fraction, message))
+        if on_partial is not None:
+            job.signals.partial.connect(on_partial)
+        job.signals.finished.connect(lambda result: self._done(job, on_finished, result))
+        job.signals.failed.connect(lambda error: self._failed(job, on_failed, error))
+        job.signals.cancelled.connect(lambda: self._done(job, on_cancelled, message=f"{label} cancelled"))
+        self.jobs[resource] = job
+        self._progress(job, 0.0, "")
+        self.pool.start(job)
+        return job
+
+    def cancel(self, resource=None):
+        """Cancels the job of ``resource``, or every job."""
+        for name, job in list(self.jobs.items()):
+            if resource is None or name == resource:
+                job.cancel()
+
+    def wait(self, timeout=-1):
+        """Blocks until every started job has returned."""
+        return self.pool.waitForDone(timeout)
+
+    def show_message(self, message):
+        if self.statusbar is not None:
+            self.statusbar.showMessage(message)
+
+    def _progress(self, job, fraction, message):
+        if self.progress_bar is not None:
+            self.progress_bar.setValue(int(min(max(fraction, 0.0), 1.0) * PROGRESS_STEPS))
+            self.progress_bar.show()
+        self.show_message(f"{job.label}: {message}" if message else f"{job.label}...")
+
+    def _done(self, job, callback, *args, message=None):
+        if self.jobs.get(job.resource) is job:
+            del self.jobs[job.resource]
+        if self.progress_bar is not None and not self.jobs:
+            self.progress_bar.hide()
+        if message:
+            self.show_message(message)
+        if callback is not None:
+            callback(*args)
+
+    def _failed(self, job, callback, error):
+        # Without a handler the error is at least shown rather than lost on the pool thread
+        self._done(job, callback, error, message=None if callback else f"{job.label} failed: {error}")
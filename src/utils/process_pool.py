@@ -0,0 +1,26 @@
+"""
+Process pools that are safe to start from the GUI process.
+
+Forking a process that already runs JAX or Qt threads can deadlock the child,
+so workers are started through a fork server where available and spawned
+otherwise.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def process_context():
+    """Return a multiprocessing context that never forks the calling process."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def process_pool(workers=None, initializer=None, initargs=()):
+    """A ProcessPoolExecutor using one worker per core by default."""
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=process_context(),
+        initializer=initializer,
+        initargs=initargs
+    )
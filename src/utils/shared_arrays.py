@@ -0,0 +1,105 @@
+"""
+NumPy arrays backed by named shared memory.
+
+Worker processes attach to the same block by name, so large inputs and
+results cross process boundaries without being pickled.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached blocks with the resource tracker too.
+        # Pool workers share their parent's tracker, where the name is already
+        # registered by the owner, so the registration is a no-op; unregistering
+        # here would drop the owner's entry and make its unlink fail.
+        return shared_memory.SharedMemory(name=name)
+
+
+class _MappingOwner:
+    """Keeps a shared memory mapping alive for as long as arrays built on it exist."""
+
+    def __init__(self, shm, address, shape, dtype):
+        self.shm = shm
+        self.__array_interface__ = {
+            "data": (address, False),
+            "shape": shape,
+            "typestr": dtype.str,
+            "version": 3
+        }
+
+    def __del__(self):
+        self.shm.close()
+
+
+class SharedArray:
+    """
+    A NumPy array living in a shared memory block.
+
+    The creating process owns the block and must eventually call ``unlink``
+    (or ``detach``). Workers rebuild the array from ``spec`` with ``attach``.
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self.shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape, dtype=np.float64):
+        shape = tuple(int(size) for size in np.atleast_1d(shape))
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        return cls(shared_memory.SharedMemory(create=True, size=nbytes), shape, dtype, owner=True)
+
+    @classmethod
+    def from_array(cls, array):
+        """Copy an existing array into a new shared block."""
+        array = np.asarray(array)
+        shared = cls.create(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(_attach(name), shape, np.dtype(dtype), owner=False)
+
+    @property
+    def spec(self):
+        """Picklable description used by ``attach``."""
+        return (self.shm.name, self.array.shape, self.array.dtype.str)
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+
+    def unlink(self):
+        """Close and remove the block; only the owner should call this."""
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def detach(self):
+        """
+        Remove the block's name and return its array.
+
+        The mapping stays valid until the returned array, and every view of
+        it, has been garbage collected.
+        """
+        address = self.array.__array_interface__["data"][0]
+        owner = _MappingOwner(self.shm, address, self.array.shape, self.array.dtype)
+        self.array = None
+        if self.owner:
+            self.shm.unlink()
+        return np.asarray(owner)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.array is not None:
+            self.unlink()
@@ -1 +1,175 @@
+"""
+Arranges the plot widgets inside the main window's plot area.
 
+Streamed ticks are pushed from producer threads and drawn at a fixed frame
+rate: chunks queue up as they arrive and each frame folds in all of them and
+repaints once, however many chunks or ticks came in since the last one.
+"""
+from collections import deque
+
+import numpy as np
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QVBoxLayout
+
+from .plot_widgets import PriceWidget, VolumeWidget
+
+
+def epoch_seconds(times):
+    """Epoch seconds as float64 from datetime64 values or epoch milliseconds."""
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype("datetime64[ms]").view(np.int64)
+    return times / 1000.0
+
+
+STREAM_FPS = 30
+# Most ticks a stream keeps on screen. Ring buffers hold every value twice,
+# so with six float64 columns this bounds them to ~190 MB whatever Data
+# Points is set to.
+MAX_STREAM_CAPACITY = 2_000_000
+
+
+class RingBuffer:
+    """
+    The latest ``capacity`` values of a stream in a preallocated array.
+
+    Every value is written twice, ``capacity`` slots apart, so the window
+    is always one contiguous slice: reading it is a view, never a copy.
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = int(capacity)
+        self._data = np.empty(2 * self.capacity, dtype=dtype)
+        self._end = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        self._end = 0
+        self._size = 0
+
+    def extend(self, values):
+        values = np.asarray(values)[-self.capacity:]
+        n = len(values)
+        head = min(n, self.capacity - self._end)
+        for offset in (0, self.capacity):
+            self._data[offset + self._end:offset + self._end + head] = values[:head]
+            self._data[offset:offset + n - head] = values[head:]
+        self._end = (self._end + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def view(self):
+        stop = self._end + self.capacity
+        return self._data[stop - self._size:stop]
+
+
+class PlotManager:
+    """Owns the price and volume panels of the plot area and feeds them series."""
+
+    def __init__(self, plot_area):
+        self.layout = QVBoxLayout(plot_area)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.layout.setSpacing(0)
+        self.price = PriceWidget()
+        self.volume = VolumeWidget()
+        self.volume.setXLink(self.price)
+        self.price.getPlotItem().hideAxis("bottom")
+        self.layout.addWidget(self.price, 3)
+        self.layout.addWidget(self.volume, 1)
+
+        # Streaming state: chunks waiting for the next frame and the visible window
+        self.pending = deque()
+        self.buffers = {}
+        self.capacity = 0
+        self.on_frame = None
+        # Whether the panels show a streamed window that the next one continues
+        self.continuing = False
+        self.frame_timer = QTimer(plot_area)
+        self.frame_timer.setInterval(1000 // STREAM_FPS)
+        self.frame_timer.timeout.connect(self.flush_stream)
+
+    def set_data(self, times, columns, style="line", stream=False, auto_range=True):
+        """
+        Plots a series given as bar times and a dict of OHLCV arrays, with
+        prices drawn in ``style`` ("line", "candlestick" or "ohlc").
+
+        ``stream`` marks the latest window of a stream; consecutive windows
+        update the panels in place instead of redrawing and auto-ranging them.
+        Without ``auto_range`` a new series keeps the range being viewed.
+        """
+        x = epoch_seconds(times)
+        continued = stream and self.continuing
+        self.continuing = stream
+        self.price.set_series(x, columns, style, continued, auto_range)
+        volume = columns.get("volume")
+        self.volume.setVisible(volume is not None)
+        if volume is not None:
+            self.volume.set_series(x, volume, continued, auto_range)
+
+    def set_frame(self, frame, time_column="timestamp", style="line", auto_range=True):
+        """Plots a Polars frame with a time column and OHLCV columns."""
+        columns = {name: frame.get_column(name).to_numpy() for name in frame.columns if name != time_column}
+        self.set_data(frame.get_column(time_column).to_numpy(), columns, style, auto_range=auto_range)
+
+    def clear(self):
+        self.continuing = False
+        self.price.clear_series()
+        self.volume.curve.set_pyramid(None)
+
+    @property
+    def streaming(self):
+        return self.frame_timer.isActive()
+
+    def start_stream(self, capacity, on_frame=None):
+        """
+        Starts drawing pushed ticks, keeping the latest ``capacity`` of them,
+        at most ``MAX_STREAM_CAPACITY``.
+
+        ``on_frame`` is called on the GUI thread once per frame with the
+        chunks that arrived since the previous frame, and is expected to
+        redraw; without it the buffered ticks are drawn as a line.
+        """
+        capacity = min(int(capacity), MAX_STREAM_CAPACITY)
+        if capacity != self.capacity:
+            self.capacity = capacity
+            self.buffers = {}
+        self.on_frame = on_frame
+        self.frame_timer.start()
+
+    def stop_stream(self):
+        """Draws the chunks still queued and stops the frame timer."""
+        self.frame_timer.stop()
+        self.flush_stream()
+
+    def clear_stream(self):
+        self.pending.clear()
+        self.buffers = {}
+        self.continuing = False
+
+    def push(self, chunk):
+        """Queues a chunk (a dict of arrays) for the next frame; safe from any thread."""
+        # The chunk is handed over as is: deque appends are atomic, so no lock or copy is needed
+        self.pending.append(chunk)
+
+    def flush_stream(self):
+        chunks = []
+        while self.pending:
+            chunks.append(self.pending.popleft())
+        if not chunks:
+            return
+        for chunk in chunks:
+            for name, values in chunk.items():
+                if name not in self.buffers:
+                    self.buffers[name] = RingBuffer(self.capacity, np.asarray(values).dtype)
+                self.buffers[name].extend(values)
+        if self.on_frame is not None:
+            self.on_frame(chunks)
+        else:
+            self.set_data(*self.stream_data(), stream=True)
+
+    def stream_data(self, time_column="timestamp"):
+        """Times and columns of the buffered window, as views."""
+        columns = {name: buffer.view() for name, buffer in self.buffers.items() if name != time_column}
+        return self.buffers[time_column].view(), columns
@@ -1 +1,497 @@
+"""
+PyQtGraph widgets for price and volume series of any length.
 
+Series are drawn through a decimation pyramid: every level summarises blocks
+of the level below by their first, minimum, maximum and last values, and a
+view only draws the coarsest level with no more than two blocks per pixel.
+The number of vertices drawn is bounded by the plot width rather than
+the length of the series, so panning over 1e8 points redraws a few thousand.
+Candles use the same pyramid with open, high, low and close, and are drawn
+as a handful of painter paths rather than one graphics item per candle.
+"""
+import numpy as np
+import pyqtgraph as pg
+from pyqtgraph.Qt import QtCore
+
+LEVEL_FACTOR = 4  # Points per block from one level to the next
+BODY_WIDTH = 0.7  # Candle body width as a fraction of the candle spacing
+MIN_BODY_PIXELS = 2.0  # Narrower bodies are drawn as lines
+
+
+class _Level:
+    """
+    The blocks of one pyramid level, held in buffers with room to grow.
+
+    ``origin`` is the index in the whole series of the first block held, so
+    blocks stay aligned to multiples of ``LEVEL_FACTOR`` as the front of a
+    stream is dropped. Buffers start out as the arrays they were built from
+    and are only copied when blocks are appended or rewritten, or at once
+    with ``copy`` when the caller may overwrite those arrays.
+    """
+
+    def __init__(self, columns, origin=0, copy=False):
+        self.buffers = columns
+        self.owned = False
+        if copy:
+            copies = {}
+            for buffer in columns.values():
+                copies.setdefault(id(buffer), buffer.copy())
+            self.buffers = {name: copies[id(buffer)] for name, buffer in columns.items()}
+            self.owned = True
+        self.start = 0
+        self.size = len(columns["x"])
+        self.origin = origin
+
+    def view(self):
+        return {name: buffer[self.start:self.start + self.size] for name, buffer in self.buffers.items()}
+
+    def drop(self, n):
+        self.start += n
+        self.size -= n
+        self.origin += n
+
+    def write(self, index, columns):
+        """Write blocks from local ``index`` on, discarding any after them."""
+        n = len(columns["x"])
+        self.size = min(self.size, index)
+        if not self.owned or self.start + index + n > len(self.buffers["x"]):
+            self._grow(index + n)
+        # Columns sharing a buffer (a line's low, high, first and last) are written once
+        written = set()
+        for name, buffer in self.buffers.items():
+            if id(buffer) not in written:
+                written.add(id(buffer))
+                buffer[self.start + index:self.start + index + n] = columns[name]
+        self.size = index + n
+
+    def overwrite(self, index, columns):
+        """Replace blocks in place, keeping those after them."""
+        for name, buffer in self.buffers.items():
+            buffer[self.start + index:self.start + index + len(columns["x"])] = columns[name]
+
+    def _grow(self, size):
+        """Move the blocks in use to the front of owned buffers with room for ``size``."""
+        capacity = len(self.buffers["x"]) if self.owned else 0
+        if size > capacity // 2:
+            capacity = 2 * size
+        copies = {}
+        for name, buffer in self.buffers.items():
+            if id(buffer) not in copies:
+                copy = np.empty(capacity)
+                copy[:self.size] = buffer[self.start:self.start + self.size]
+                copies[id(buffer)] = copy
+        self.buffers = {name: copies[id(buffer)] for name, buffer in self.buffers.items()}
+        self.owned = True
+        self.start = 0
+
+
+class DecimationPyramid:
+    """
+    Min/max summaries of a series at successively coarser resolutions.
+
+    Level 0 is the series itself; level ``k`` holds one block per
+    ``LEVEL_FACTOR ** k`` points with the x of its first point and the
+    first, min, max and last of its values. A line passes the same array
+    for all four; candles pass open, low, high and close. Built once per
+    dataset, in time linear in its length and about a third more memory.
+    A stream's window is followed with ``update``, which only re-summarises
+    the blocks holding dropped, revised or appended points; ``copy`` keeps
+    the series apart from arrays the stream overwrites, like ring buffer views.
+    """
+
+    def __init__(self, x, low, high=None, first=None, last=None, min_blocks=256, copy=False):
+        self.min_blocks = min_blocks
+        self._levels = [_Level(self._columns(x, low, high, first, last), copy=copy)]
+        self._add_levels()
+        self._refresh_views()
+
+    @staticmethod
+    def _columns(x, low, high=None, first=None, last=None):
+        low = np.asarray(low, dtype=np.float64)
+        return {
+            "x": np.asarray(x, dtype=np.float64),
+            "low": low,
+            "high": low if high is None else np.asarray(high, dtype=np.float64),
+            "first": low if first is None else np.asarray(first, dtype=np.float64),
+            "last": low if last is None else np.asarray(last, dtype=np.float64)
+        }
+
+    def _refresh_views(self):
+        self.levels = [level.view() for level in self._levels]
+
+    def _add_levels(self):
+        while self._levels[-1].size > self.min_blocks:
+            below = self._levels[-1]
+            origin = below.origin // LEVEL_FACTOR
+            end = -(-(below.origin + below.size) // LEVEL_FACTOR)
+            self._levels.append(_Level(self._summarise(len(self._levels), origin, end), origin))
+
+    def _summarise(self, index, lo, hi):
+        """Blocks ``[lo, hi)`` of level ``index``, summarised from the level below."""
+        below = self._levels[index - 1]
+        values = below.view()
+        # Block boundaries in the level below, the first clipped to the blocks it holds
+        bounds = np.arange(lo * LEVEL_FACTOR, hi * LEVEL_FACTOR, LEVEL_FACTOR) - below.origin
+        bounds[0] = max(bounds[0], 0)
+        stop = min(hi * LEVEL_FACTOR - below.origin, below.size)
+        ends = np.append(bounds[1:], stop) - 1
+        return {
+            "x": values["x"][bounds],
+            "low": np.minimum.reduceat(values["low"][:stop], bounds),
+            "high": np.maximum.reduceat(values["high"][:stop], bounds),
+            "first": values["first"][bounds],
+            "last": values["last"][ends]
+        }
+
+    def __len__(self):
+        return len(self.levels[0]["x"])
+
+    def update(self, x, low, high=None, first=None, last=None):
+        """
+        Follow the window of a stream to its next position.
+
+        The new window may only drop points from the front, revise the last
+        point and append points, as a ring buffer of ticks or a tail of bars
+        does. Returns False, leaving the pyramid as it was, when ``x`` does
+        not continue the series that way.
+        """
+        old = self.levels[0]["x"]
+        x = np.asarray(x, dtype=np.float64)
+        if not len(old) or not len(x):
+            return False
+        dropped = int(np.searchsorted(old, x[0]))
+        kept = len(old) - dropped
+        if kept <= 0 or kept > len(x) or old[dropped] != x[0] or x[kept - 1] != old[-1]:
+            return False
+        columns = self._columns(x, low, high, first, last)
+        self._levels[0].drop(dropped)
+        self._levels[0].write(kept - 1, {name: values[kept - 1:] for name, values in columns.items()})
+        # Index in the series of the first revised point, then of the block holding it at each level
+        revised = self._levels[0].origin + kept - 1
+        for index in range(1, len(self._levels)):
+            level, below = self._levels[index], self._levels[index - 1]
+            level.drop(below.origin // LEVEL_FACTOR - level.origin)
+            revised //= LEVEL_FACTOR
+            end = -(-(below.origin + below.size) // LEVEL_FACTOR)
+            level.write(revised - level.origin, self._summarise(index, revised, end))
+            if dropped and revised > level.origin:
+                # The first block lost the points dropped from the front of the window
+                level.overwrite(0, self._summarise(index, level.origin, level.origin + 1))
+        self._add_levels()
+        self._refresh_views()
+        return True
+
+    @property
+    def x_range(self):
+        x = self.levels[0]["x"]
+        return (x[0], x[-1]) if len(x) else (0.0, 1.0)
+
+    def select(self, x0, x1, max_blocks):
+        """
+        The coarsest useful level for ``[x0, x1]`` and its blocks in that range.
+
+        Returns ``(level, block)`` where ``block`` is a dict of array views,
+        including one block on either side so lines run to the plot edges.
+        """
+        for index in range(len(self.levels)):
+            block = self.select_level(index, x0, x1)
+            if len(block["x"]) <= max_blocks or index == len(self.levels) - 1:
+                return index, block
+
+    def select_level(self, index, x0, x1):
+        """The blocks of level ``index`` in ``[x0, x1]``, plus one on either side."""
+        x = self.levels[index]["x"]
+        start = max(int(np.searchsorted(x, x0, side="right")) - 1, 0)
+        stop = min(int(np.searchsorted(x, x1, side="right")) + 1, len(x))
+        return {name: values[start:stop] for name, values in self.levels[index].items()}
+
+    def line(self, x0, x1, max_blocks):
+        """Vertices of a line through ``[x0, x1]`` using at most ``2 * max_blocks`` points."""
+        index, block = self.select(x0, x1, max_blocks)
+        if index == 0:
+            return block["x"], block["last"]
+        # Each block is drawn as a vertical stroke from its minimum to its maximum
+        x = np.repeat(block["x"], 2)
+        y = np.empty(len(x))
+        y[0::2] = block["low"]
+        y[1::2] = block["high"]
+        return x, y
+
+
+class LodCurveItem(pg.PlotCurveItem):
+    """
+    A curve redrawn from a DecimationPyramid whenever the view range changes.
+
+    Only the decimated vertices of the visible range are handed to Qt, at
+    most four per horizontal pixel.
+    """
+
+    def __init__(self, pyramid=None, **kwargs):
+        kwargs.setdefault("skipFiniteCheck", True)
+        super().__init__(**kwargs)
+        self.pyramid = None
+        self._shown = None
+        self.set_pyramid(pyramid)
+
+    def set_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self._shown = None
+        if pyramid is None or not len(pyramid):
+            self.setData([], [])
+            return
+        self.refresh()
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        # Report the full x extent so auto-range covers the series, not just the drawn part
+        if ax == 0 and self.pyramid is not None and len(self.pyramid):
+            return self.pyramid.x_range
+        return super().dataBounds(ax, frac, orthoRange)
+
+    def viewRangeChanged(self):
+        self.refresh()
+
+    def refresh(self):
+        if self.pyramid is None or not len(self.pyramid):
+            return
+        view = self.getViewBox()
+        if view is None:
+            x0, x1 = self.pyramid.x_range
+            pixels = 1000
+        else:
+            (x0, x1), _ = view.viewRange()
+            pixels = max(int(view.width()), 1)
+        # Levels are LEVEL_FACTOR apart, so allow up to two blocks per pixel to stay sharp
+        max_blocks = 2 * pixels
+        index, block = self.pyramid.select(x0, x1, max_blocks)
+        shown = (index, len(block["x"]), block["x"][0] if len(block["x"]) else None)
+        if shown == self._shown:
+            return
+        self._shown = shown
+        x, y = self.pyramid.line(x0, x1, max_blocks)
+        self.setData(x, y)
+
+
+class CandlestickItem(pg.GraphicsObject):
+    """
+    Candlestick or OHLC bars of a whole series in a single graphics item.
+
+    The candles around the visible range are turned into a few QPainterPaths
+    at once with ``arrayToQPath``: wicks and bodies of rising and of falling
+    candles. Paths cover one view width on either side of the view and are
+    only rebuilt when the view leaves them, the pyramid level changes or new
+    data is set, so panning mostly just repaints. Where candles would be
+    narrower than ``pixels_per_candle``, the pyramid merges them into wider
+    ones with exact open, high, low and close.
+    """
+
+    def __init__(self, style="candlestick", pixels_per_candle=2.0,
+                 up_color="#26a69a", down_color="#ef5350"):
+        super().__init__()
+        self.style = style
+        self.pixels_per_candle = pixels_per_candle
+        self.pens = {True: pg.mkPen(up_color), False: pg.mkPen(down_color)}
+        self.brushes = {True: pg.mkBrush(up_color), False: pg.mkBrush(down_color)}
+        self.pyramid = None
+        self._paths = []
+        self._bounds = QtCore.QRectF()
+        self._cache = None
+        self._spacing = {}
+
+    def set_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self._cache = None
+        self._spacing = {}
+        self.refresh()
+
+    def set_style(self, style):
+        if style != self.style:
+            self.style = style
+            self._cache = None
+            self.refresh()
+
+    def viewRangeChanged(self):
+        self.refresh()
+
+    def _candle_spacing(self, index):
+        """Typical distance between candles at a pyramid level."""
+        if index not in self._spacing:
+            x = self.pyramid.levels[index]["x"][:1001]
+            self._spacing[index] = float(np.median(np.diff(x))) if len(x) > 1 else 1.0
+        return self._spacing[index]
+
+    def refresh(self):
+        if self.pyramid is None or not len(self.pyramid):
+            self._set_paths([], None)
+            return
+        view = self.getViewBox()
+        if view is None:
+            x0, x1 = self.pyramid.x_range
+            pixels = 1000
+        else:
+            (x0, x1), _ = view.viewRange()
+            pixels = max(int(view.width()), 1)
+        max_candles = max(int(pixels / self.pixels_per_candle), 1)
+        index, _ = self.pyramid.select(x0, x1, max_candles)
+        spacing = self._candle_spacing(index)
+        width = max(x1 - x0, spacing)
+        # Filling thousands of sub-pixel rectangles is slow, so thin bodies are stroked instead
+        thin = BODY_WIDTH * spacing * pixels / width < MIN_BODY_PIXELS
+        if self._cache is not None:
+            level, c0, c1, cached_thin = self._cache
+            if level == index and c0 <= x0 and x1 <= c1 and thin == cached_thin:
+                return
+        # Build one view width beyond each side so small pans reuse the paths
+        block = self.pyramid.select_level(index, x0 - width, x1 + width)
+        self._set_paths(self._build(block, spacing, thin), (index, x0 - width, x1 + width, thin))
+
+    def _build(self, block, spacing, thin=False):
+        x, low, high = block["x"], block["low"], block["high"]
+        first, last = block["first"], block["last"]
+        half = BODY_WIDTH * spacing / 2
+        paths = []
+        rising = last >= first
+        for up in (True, False):
+            mask = rising == up
+            if not mask.any():
+                continue
+            cx, lo, hi, op, cl = x[mask], low[mask], high[mask], first[mask], last[mask]
+            if self.style == "ohlc":
+                # High-low stroke, open tick to the left and close tick to the right
+                xs = np.column_stack((cx, cx, cx - half, cx, cx, cx + half)).ravel()
+                ys = np.column_stack((lo, hi, op, op, cl, cl)).ravel()
+                paths.append((up, pg.arrayToQPath(xs, ys, connect="pairs", finiteCheck=False), False))
+                continue
+            xs = np.repeat(cx, 2)
+            ys = np.column_stack((lo, hi)).ravel()
+            paths.append((up, pg.arrayToQPath(xs, ys, connect="pairs", finiteCheck=False), False))
+            if thin:
+                ys = np.column_stack((op, cl)).ravel()
+                paths.append((up, pg.arrayToQPath(xs, ys, connect="pairs", finiteCheck=False), False))
+                continue
+            # Bodies as closed rectangles, each starting a new subpath
+            left, right = cx - half, cx + half
+            xs = np.column_stack((left, right, right, left, left)).ravel()
+            ys = np.column_stack((op, op, cl, cl, op)).ravel()
+            connect = np.tile(np.array([0, 1, 1, 1, 1], dtype=np.int32), len(cx))
+            paths.append((up, pg.arrayToQPath(xs, ys, connect=connect, finiteCheck=False), True))
+        return paths
+
+    def _set_paths(self, paths, cache):
+        self.prepareGeometryChange()
+        self._paths = paths
+        self._cache = cache
+        bounds = QtCore.QRectF()
+        for _, path, _ in paths:
+            bounds = bounds.united(path.boundingRect())
+        self._bounds = bounds
+        self.update()
+
+    def paint(self, painter, *args):
+        for up, path, filled in self._paths:
+            painter.setPen(self.pens[up])
+            painter.setBrush(self.brushes[up] if filled else QtCore.Qt.NoBrush)
+            painter.drawPath(path)
+
+    def boundingRect(self):
+        return self._bounds
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        if self.pyramid is None or not len(self.pyramid):
+            return None, None
+        if ax == 0:
+            return self.pyramid.x_range
+        if self._cache is None:
+            return None, None
+        level, c0, c1, _ = self._cache
+        x0, x1 = orthoRange if orthoRange is not None else (c0, c1)
+        block = self.pyramid.select_level(level, x0, x1)
+        if not len(block["x"]):
+            return None, None
+        return float(block["low"].min()), float(block["high"].max())
+
+
+def _continue(item, series):
+    """
+    Moves ``item`` on to the next window of a stream; returns the x where the
+    previous window ended, or None when ``series`` does not continue it.
+    """
+    pyramid = item.pyramid
+    if pyramid is None or not len(pyramid):
+        return None
+    end = pyramid.x_range[1]
+    if not pyramid.update(*series):
+        return None
+    item.set_pyramid(pyramid)
+    return end
+
+
+class PriceWidget(pg.PlotWidget):
+    """Price panel with a date axis; x values are epoch seconds."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent, axisItems={"bottom": pg.DateAxisItem()})
+        self.showGrid(x=True, y=True, alpha=0.2)
+        self.setClipToView(False)
+        self.curve = LodCurveItem(pen=pg.mkPen("#4c9be8", width=1))
+        self.candles = CandlestickItem()
+        self.addItem(self.curve)
+        self.addItem(self.candles)
+        # The x range is driven by the user, the y range follows the visible data
+        self.getViewBox().setAutoVisible(y=True)
+
+    def set_series(self, x, columns, style="line", stream=False, auto_range=True):
+        """
+        Plots ``columns`` (a dict of OHLC arrays) as a "line" of closes, or as
+        "candlestick" or "ohlc" bars when open, high and low are available.
+
+        A new series is auto-ranged unless ``auto_range`` is False. With
+        ``stream``, the series is the next window of the one shown: its
+        pyramid is updated in place, and the view keeps its range, moving
+        along with the newest data if it showed them.
+        """
+        if style != "line" and all(name in columns for name in ("open", "high", "low")):
+            self.candles.set_style(style)
+            item, other = self.candles, self.curve
+            series = (x, columns["low"], columns["high"], columns["open"], columns["close"])
+        else:
+            item, other = self.curve, self.candles
+            series = (x, columns["close"])
+        if other.pyramid is not None:
+            other.set_pyramid(None)
+        end = _continue(item, series) if stream else None
+        if end is not None:
+            (x0, x1), _ = self.viewRange()
+            if x1 >= end:
+                # The view showed the newest data, so it keeps following them
+                shift = item.pyramid.x_range[1] - end
+                self.setXRange(x0 + shift, x1 + shift, padding=0)
+                self.enableAutoRange(y=True)
+            return
+        item.set_pyramid(DecimationPyramid(*series, copy=stream))
+        if auto_range:
+            self.autoRange()
+
+    def clear_series(self):
+        self.curve.set_pyramid(None)
+        self.candles.set_pyramid(None)
+
+
+class VolumeWidget(pg.PlotWidget):
+    """Volume panel drawn as the per-pixel maximum, filled down to zero."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent, axisItems={"bottom": pg.DateAxisItem()})
+        self.showGrid(x=True, y=True, alpha=0.2)
+        self.curve = LodCurveItem(pen=pg.mkPen("#888888"), fillLevel=0, brush=pg.mkBrush(136, 136, 136, 90))
+        self.addItem(self.curve)
+        self.getViewBox().setAutoVisible(y=True)
+        self.setMouseEnabled(y=False)
+
+    def set_series(self, x, volume, stream=False, auto_range=True):
+        if stream and _continue(self.curve, (x, volume)) is not None:
+            # The x range follows the linked price panel
+            self.enableAutoRange(y=True)
+            return
+        self.curve.set_pyramid(DecimationPyramid(x, volume, copy=stream))
+        if auto_range:
+            self.autoRange()
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from trading.backtester import event_backtest_reference
+
+
+def ohlc(n, seed=0):
+    """Bars whose opens gap away from the previous close."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open = np.concatenate(([close[0]], close[:-1])) * np.exp(rng.normal(0, 0.003, n))
+    high = np.maximum(close, open) * (1 + np.abs(rng.normal(0, 0.001, n)))
+    low = np.minimum(close, open) * (1 - np.abs(rng.normal(0, 0.001, n)))
+    signals = np.where(rng.random(n) < 0.02, np.sign(rng.normal(size=n)), np.nan)
+    return close, signals, high, low, open
+
+
+@pytest.mark.parametrize("side", [1.0, -1.0])
+def test_stop_fills_at_the_open_of_a_gap(side):
+    # In at 100; the next bar opens 10% against the position, beyond the 5% stop
+    close = np.array([100.0, 100 - side * 9, 100 - side * 8])
+    open = np.array([100.0, 100 - side * 10, 100 - side * 9])
+    high, low = np.maximum(close, open) + 1, np.minimum(close, open) - 1
+    result = event_backtest_reference(close, np.array([side, np.nan, np.nan]), high, low, open,
+                                      stop_loss=0.05, fee=0.0, slippage=0.0)
+    np.testing.assert_allclose(result.equity, [1.0, 0.9, 0.9])
+
+
+def test_stop_inside_the_bar_fills_at_the_stop():
+    close = np.array([100.0, 97.0])
+    result = event_backtest_reference(close, np.array([1.0, np.nan]), np.array([100.0, 99.0]),
+                                      np.array([100.0, 94.0]), np.array([100.0, 98.0]),
+                                      stop_loss=0.05, fee=0.0, slippage=0.0)
+    np.testing.assert_allclose(result.equity, [1.0, 0.95])
+
+
+def test_compiled_loop_matches_the_reference():
+    pytest.importorskip("numba")
+    from trading.backtester import event_backtest
+
+    bars = ohlc(20_000)
+    rules = {"stop_loss": 0.01, "take_profit": 0.02, "trailing_stop": 0.015, "fraction": 0.5}
+    compiled = event_backtest(*bars, **rules)
+    reference = event_backtest_reference(*bars, **rules)
+    assert np.array_equal(compiled.equity, reference.equity)
+    assert np.array_equal(compiled.positions, reference.positions)
+    assert np.array_equal(compiled.costs, reference.costs)
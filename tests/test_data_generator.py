@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from data.data_generator import DataGenerator, InfiniteDataRun
+
+SETTINGS = [
+    {},
+    {"regime_switching": True},
+    {"distribution": "Jump Diffusion"},
+    {"distribution": "GARCH"}
+]
+
+
+def concatenate(chunks):
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def assert_same(a, b):
+    assert a.keys() == b.keys()
+    for name in a:
+        np.testing.assert_array_equal(a[name], b[name], err_msg=name)
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+def test_chunk_size_does_not_change_the_path(settings):
+    expected = DataGenerator(settings, seed=1).generate_arrays(200_000)
+    assert_same(DataGenerator(settings, seed=1, chunk_size=100_000).generate_arrays(200_000), expected)
+
+    generator = DataGenerator(settings, seed=1)
+    sizes = [7, 16_384, 100_000, 1, 65_536, 18_072]
+    assert_same(concatenate([generator.next_chunk(size) for size in sizes]), expected)
+    assert generator.tick == 200_000
+
+
+def test_reset_replays_the_stream_with_other_chunk_sizes():
+    generator = DataGenerator(seed=2)
+    first = concatenate([generator.next_chunk(16_384) for _ in range(4)])
+    generator.reset()
+    second = concatenate([generator.next_chunk(8_192) for _ in range(8)])
+    assert_same(first, second)
+
+
+def test_state_snapshot_restores_buffered_ticks():
+    generator = DataGenerator({"regime_switching": True}, seed=3)
+    generator.next_chunk(1_000)
+    state = generator.get_state()
+    expected = generator.next_chunk(70_000)
+    generator.set_state(state)
+    assert_same(generator.next_chunk(70_000), expected)
+
+
+def test_paused_infinite_run_continues_the_same_stream():
+    run = InfiniteDataRun(DataGenerator(seed=4), chunk_size=5_000, initial_points=12_000)
+    run.start()
+    chunks = [run.next_chunk() for _ in range(3)]
+    run.pause()
+    assert run.next_chunk() is None
+    run.start()
+    chunks += [run.next_chunk() for _ in range(2)]
+    assert [len(chunk["close"]) for chunk in chunks] == [5_000, 5_000, 2_000, 5_000, 5_000]
+
+    run.reset()
+    run.start()
+    replay = concatenate([run.next_chunk() for _ in range(5)])
+    assert_same(concatenate(chunks), replay)
+    assert_same(concatenate(chunks), DataGenerator(seed=4).generate_arrays(22_000))
+
+
+def test_infinite_run_does_not_throttle_the_initial_history():
+    run = InfiniteDataRun(DataGenerator(seed=5), chunk_size=5_000, initial_points=12_000)
+    chunks = []
+
+    def sink(chunk):
+        chunks.append(chunk)
+        if run.is_live:
+            run.pause()
+
+    run.start()
+    # Any wait between history chunks would take a minute each
+    run.run(sink, interval=60.0)
+    assert [len(chunk["close"]) for chunk in chunks] == [5_000, 5_000, 2_000]
@@ -0,0 +1,75 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from data.data_generator import DataGenerator
+from data.data_processor import (PERIODS, BarResampler, _imbalance_loop, aggregate_bars, imbalance_starts, resample,
+                                 tick_rule)
+
+
+@pytest.fixture(scope="module")
+def ticks():
+    return DataGenerator(seed=3).generate(200_000)
+
+
+def tick_arrays(frame):
+    return {name: frame.get_column(name).to_numpy() for name in frame.columns}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 997, 50_000])
+def test_incremental_bars_match_batch_aggregation(ticks, chunk_size):
+    resampler = BarResampler()
+    # Single ticks are slow to stream, so feed them only at the start
+    stop = 5000 if chunk_size == 1 else len(ticks)
+    for start in range(0, stop, chunk_size):
+        resampler.update(ticks.slice(start, chunk_size))
+    columns = tick_arrays(ticks.head(stop))
+    times = columns["timestamp"].astype("datetime64[ms]").view(np.int64)
+    for period_ms in filter(None, PERIODS.values()):
+        expected_times, expected = aggregate_bars(times, columns, period_ms)
+        bar_times, bars = resampler.bars(period_ms)
+        assert np.array_equal(bar_times, expected_times)
+        for name in ("open", "high", "low", "close"):
+            assert np.array_equal(bars[name], expected[name]), (period_ms, name)
+        # Volume is summed in a different order when bars are merged across chunks
+        np.testing.assert_allclose(bars["volume"], expected["volume"], rtol=1e-12)
+
+
+def test_incremental_bars_match_polars_resample(ticks):
+    resampler = BarResampler()
+    for start in range(0, len(ticks), 12_345):
+        resampler.update(ticks.slice(start, 12_345))
+    period_ms = PERIODS["5 Minutes"]
+    expected = resample(ticks.select("timestamp", "open", "high", "low", "close", "volume"), period_ms)
+    bars = resampler.frame(period_ms)
+    assert bars.get_column("timestamp").cast(pl.Datetime("ms")).equals(
+        expected.get_column("timestamp").cast(pl.Datetime("ms")))
+    for name in ("open", "high", "low", "close", "volume"):
+        np.testing.assert_allclose(bars.get_column(name).to_numpy(), expected.get_column(name).to_numpy(),
+                                   rtol=1e-12)
+
+
+def test_compiled_imbalance_loop_matches_the_interpreted_one(ticks):
+    pytest.importorskip("numba")
+    signs = tick_rule(ticks.get_column("close").to_numpy()).astype(np.int64)
+    starts = imbalance_starts(signs, initial_ticks=500)
+    assert len(starts) > 10
+    assert np.array_equal(starts, _imbalance_loop(signs, 500.0, float(np.mean(signs[:500])), 0.1, 50.0, 5000.0))
+
+
+def test_bounded_resampler_keeps_the_latest_bars(ticks):
+    bounded, full = BarResampler(max_bars=500), BarResampler()
+    for start in range(0, len(ticks), 997):
+        bounded.update(ticks.slice(start, 997))
+        full.update(ticks.slice(start, 997))
+    # Dropped bars are compacted away, so the arrays stay bounded too
+    assert bounded.series[0].length < 2 * (500 + 6)
+    for period_ms in filter(None, PERIODS.values()):
+        bar_times, bars = bounded.bars(period_ms)
+        all_times, all_bars = full.bars(period_ms)
+        # A few more are kept while the next period's open bar still needs them
+        assert min(500, len(all_times)) <= len(bar_times) < 500 + 6
+        assert np.array_equal(bar_times, all_times[-len(bar_times):])
+        for name in ("open", "high", "low", "close"):
+            assert np.array_equal(bars[name], all_bars[name][-len(bar_times):]), (period_ms, name)
+        np.testing.assert_allclose(bars["volume"], all_bars["volume"][-len(bar_times):], rtol=1e-12)
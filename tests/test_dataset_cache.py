@@ -0,0 +1,36 @@
+import os
+
+from data.data_generator import DataGenerator
+from data.dataset_cache import DatasetCache, dataset_key
+
+
+def test_cache_hit_returns_the_generated_frame(tmp_path):
+    cache = DatasetCache(tmp_path)
+    key = dataset_key(DataGenerator(seed=11), 100_000)
+    assert cache.load(key) is None
+    data = DataGenerator(seed=11).generate(100_000)
+    assert cache.store(key, data)
+    assert cache.load(key).equals(data)
+
+
+def test_key_depends_on_settings_not_chunk_size():
+    generator = DataGenerator(seed=11)
+    assert dataset_key(generator, 1000) == dataset_key(DataGenerator(seed=11, chunk_size=123), 1000)
+    assert dataset_key(generator, 1000) != dataset_key(DataGenerator(seed=12), 1000)
+    assert dataset_key(generator, 1000) != dataset_key(generator, 1001)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    frames = {seed: DataGenerator(seed=seed).generate(20_000) for seed in range(3)}
+    size = frames[0].estimated_size()
+    cache = DatasetCache(tmp_path, max_bytes=int(2.5 * size))
+    cache.store("a", frames[0])
+    cache.store("b", frames[1])
+    # File times can be too coarse to order writes made in quick succession, so age them by hand
+    for age, key in enumerate("ab"):
+        os.utime(cache.path(key), ns=(10 ** 9 * (age + 1),) * 2)
+    cache.load("a")
+    cache.store("c", frames[2])
+    assert cache.load("b") is None
+    assert cache.load("a").equals(frames[0])
+    assert cache.load("c").equals(frames[2])
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from computation.machine_learning import SyntheticBatches, train
+from data.data_generator import DataGenerator
+
+
+class AlternatingPrices:
+    """Prices whose returns alternate in sign, so the next one is predictable from the last."""
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.close = 100.0
+        self.sign = 1.0
+
+    def next_chunk(self, n_points):
+        signs = self.sign * (-1.0) ** np.arange(n_points)
+        self.sign = -signs[-1]
+        returns = signs * self.rng.uniform(0.005, 0.015, n_points)
+        close = self.close * np.exp(np.cumsum(returns))
+        self.close = close[-1]
+        return {"close": close}
+
+
+def test_batches_line_up_with_lagged_returns_across_chunks():
+    pytest.importorskip("jax")
+    n_lags, batch_size = 8, 64
+    batches = SyntheticBatches(DataGenerator(seed=6), n_lags, batch_size, shuffle=False)
+    # Three generator chunks' worth of batches, so samples span two chunk boundaries
+    pulled = [batch for _, batch in zip(range(3 * 16 - 1), batches)]
+    features = np.concatenate([features for features, _ in pulled])
+    labels = np.concatenate([labels for _, labels in pulled])
+
+    returns = np.diff(np.log(DataGenerator(seed=6).generate_arrays(len(labels) + n_lags + 1)["close"]))
+    scale = returns[:batches.chunk_size - 1].std()
+    returns = (returns / scale).astype(np.float32)
+    np.testing.assert_array_equal(features, np.lib.stride_tricks.sliding_window_view(returns[:-1], n_lags))
+    np.testing.assert_array_equal(labels, (returns[n_lags:] > 0.0).astype(np.float32))
+
+
+def test_training_lowers_the_loss_on_separable_batches():
+    pytest.importorskip("jax")
+    result = train(AlternatingPrices(), "Logistic Regression", steps=300, batch_size=256, n_lags=4,
+                   learning_rate=1e-2, prefetch=2)
+    assert result.losses[-20:].mean() < 0.5 * result.losses[:20].mean()
+    assert result.accuracies[-20:].mean() == 1.0
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from computation import numerical_methods
+from computation.numerical_methods import (OnlineEMA, OnlineMax, OnlineMin, OnlineSMA, OnlineStd, batch_rolling_std,
+                                           batch_sma, ema, rolling_max, rolling_min, rolling_std, sma)
+
+INDICATORS = [(OnlineSMA, sma), (OnlineStd, rolling_std), (OnlineEMA, ema),
+              (OnlineMin, rolling_min), (OnlineMax, rolling_max)]
+
+
+@pytest.fixture
+def prices():
+    return 1e4 + np.cumsum(np.random.default_rng(0).normal(size=6000))
+
+
+@pytest.fixture(autouse=True)
+def short_segments(monkeypatch):
+    # Re-centre the moving sums often, so the streams cross many segment boundaries
+    monkeypatch.setattr(numerical_methods, "REBASE_PERIOD", 1000)
+
+
+@pytest.mark.parametrize("window", [1, 7, 50, 1000, 2500])
+@pytest.mark.parametrize("online, batch", INDICATORS)
+def test_stream_matches_batch(online, batch, window, prices):
+    expected = batch(prices, window)
+    indicator = online(window)
+    values = [indicator.update(value) for value in prices[:1500]]
+    values.extend(indicator.update_chunk(prices[1500:3001]))
+    for start in range(3001, len(prices), 777):
+        values.extend(indicator.update_chunk(prices[start:start + 777]))
+    assert np.array_equal(np.asarray(values), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("online, batch", INDICATORS)
+def test_restored_state_continues_the_stream(online, batch, prices):
+    indicator = online(200)
+    indicator.update_chunk(prices[:2345])
+    restored = online(200)
+    restored.set_state(indicator.get_state())
+    assert np.array_equal(restored.update_chunk(prices[2345:]), batch(prices, 200)[2345:], equal_nan=True)
+
+
+def test_rolling_std_stays_precise_far_from_zero():
+    x = 1e6 + np.cumsum(np.random.default_rng(1).normal(0, 1e-3, 300_000))
+    window = 200
+    exact = np.array([x[i - window + 1:i + 1].std() for i in range(len(x) - 100, len(x))])
+    np.testing.assert_allclose(rolling_std(x, window)[-100:], exact, rtol=1e-7)
+
+
+@pytest.mark.parametrize("batched, batch", [(batch_sma, sma), (batch_rolling_std, rolling_std)])
+def test_batched_kernels_match_numpy_on_long_series(batched, batch):
+    pytest.importorskip("jax")
+    x = 1e6 + np.cumsum(np.random.default_rng(2).normal(0, 1e-3, (2, 50_000)), axis=1)
+    expected = np.array([batch(row, 200) for row in x])
+    np.testing.assert_allclose(batched(x, 200), expected, rtol=1e-9, atol=1e-9)
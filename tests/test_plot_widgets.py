@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyqtgraph")
+
+from visualization.plot_widgets import LEVEL_FACTOR, DecimationPyramid
+
+
+def assert_summarises(pyramid):
+    """Every block of every level summarises the points of the series it covers."""
+    series = pyramid.levels[0]
+    base = pyramid._levels[0].origin
+    for index in range(1, len(pyramid.levels)):
+        size = LEVEL_FACTOR ** index
+        level, origin = pyramid.levels[index], pyramid._levels[index].origin
+        for block in range(len(level["x"])):
+            lo = max((origin + block) * size, base) - base
+            hi = min((origin + block + 1) * size - base, len(series["x"]))
+            assert level["x"][block] == series["x"][lo]
+            assert level["low"][block] == series["low"][lo:hi].min()
+            assert level["high"][block] == series["high"][lo:hi].max()
+            assert level["first"][block] == series["first"][lo]
+            assert level["last"][block] == series["last"][hi - 1]
+
+
+def test_update_follows_a_sliding_window_of_ticks():
+    rng = np.random.default_rng(0)
+    x = np.arange(100_000, dtype=np.float64)
+    y = rng.normal(size=len(x)).cumsum()
+    end, capacity = 3000, 5000
+    pyramid = DecimationPyramid(x[:end], y[:end])
+    for _ in range(100):
+        end += int(rng.integers(1, 700))
+        start = max(end - capacity, 0)
+        assert pyramid.update(x[start:end], y[start:end])
+        np.testing.assert_array_equal(pyramid.levels[0]["low"], y[start:end])
+    assert_summarises(pyramid)
+
+
+def test_update_revises_the_last_bar():
+    rng = np.random.default_rng(1)
+    x = np.arange(20_000, dtype=np.float64)
+    close = rng.normal(size=len(x)).cumsum()
+    high, low = close + 1, close - 1
+    end = 2000
+    pyramid = DecimationPyramid(x[:end], low[:end], high[:end], close[:end], close[:end])
+    for _ in range(50):
+        # The open bar gains a new high before more bars arrive
+        high[end - 1] += 5
+        end += int(rng.integers(0, 200))
+        start = max(end - 4000, 0)
+        assert pyramid.update(x[start:end], low[start:end], high[start:end], close[start:end], close[start:end])
+        assert_summarises(pyramid)
+
+
+def test_update_rejects_a_series_it_does_not_continue():
+    x = np.arange(1000, dtype=np.float64)
+    pyramid = DecimationPyramid(x[500:], x[500:])
+    assert not pyramid.update(x[:400], x[:400])
+    assert not pyramid.update(x[600:900], x[600:900])
+    np.testing.assert_array_equal(pyramid.levels[0]["x"], x[500:])
+
+
+def test_stream_frames_of_a_full_ring_update_in_place():
+    pytest.importorskip("PySide6")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication, QWidget
+
+    from visualization.plot_manager import PlotManager
+
+    app = QApplication.instance() or QApplication([])
+    manager = PlotManager(QWidget())
+    manager.start_stream(5000)
+    manager.frame_timer.stop()
+    times = np.arange(50_000).astype("datetime64[s]").astype("datetime64[ms]")
+    close = np.random.default_rng(2).normal(size=len(times)).cumsum()
+    # The history fills the ring before the first frame
+    manager.push({"timestamp": times[:8000], "close": close[:8000]})
+    manager.flush_stream()
+    pyramid = manager.price.curve.pyramid
+    for end in range(8700, 50_000, 700):
+        manager.push({"timestamp": times[end - 700:end], "close": close[end - 700:end]})
+        manager.flush_stream()
+        assert manager.price.curve.pyramid is pyramid
+        np.testing.assert_array_equal(pyramid.levels[0]["low"], close[end - 5000:end])
+    assert_summarises(pyramid)
@@ -3,6 +3,7 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
 
 from PySide6.QtWidgets import QApplication, QMainWindow, QDialog
 from src.ui.generated_ui import Ui_MainWindow, Ui_LoadDataDialog, Ui_SettingsDialog